@@ -1,36 +1,1099 @@
 # Imports
+import time
+_startup_began = time.perf_counter()
+
 import dash
 import dash_bootstrap_components as dbc
-from dash import dcc, Input, Output, html, dash_table, callback, State, clientside_callback
-import plotly.express as px
+from dash import dcc, Input, Output, html, dash_table, callback, State, clientside_callback, Patch
 import pandas as pd
+import plotly
+import plotly.io
 import plotly.graph_objs as go
+from plotly.subplots import make_subplots
+import numpy as np
 import io
-from datetime import datetime
+import os
+import sys
+import pickle
+import json
+import base64
+import csv
+import hashlib
+import hmac
+import cProfile
+import shutil
+import tempfile
+import threading
+import zipfile
+import html as html_escape
+from contextlib import contextmanager
+import plotly.offline
+from collections import namedtuple
+from datetime import datetime, timezone
+from flask import Response, g, jsonify, request, send_from_directory, url_for
+
+try:
+    import fcntl
+except ImportError:
+    # Windows has no flock, so writers there are only serialized within one process
+    fcntl = None
+
+
+# Startup Profiling
+# Set SWIM_PROFILE_STARTUP=1 to print where import-time work goes
+PROFILE_STARTUP = os.environ.get("SWIM_PROFILE_STARTUP") == "1"
+_startup_timings = [("imports", time.perf_counter() - _startup_began)]
+_last_startup_stage = time.perf_counter()
+
+
+def startup_stage(name):
+    global _last_startup_stage
+    now = time.perf_counter()
+    _startup_timings.append((name, now - _last_startup_stage))
+    _last_startup_stage = now
+
+
+def report_startup():
+    if not PROFILE_STARTUP:
+        return
+    total = time.perf_counter() - _startup_began
+    print(f"Startup profile ({total:.3f}s total)", file=sys.stderr)
+    for name, seconds in _startup_timings:
+        print(f"  {name:<28}{seconds:8.3f}s {seconds / total:7.1%}", file=sys.stderr)
+
+
+# Plotly Express takes a noticeable share of boot time, so it is only imported once a chart needs it
+def plotly_express():
+    import plotly.express as px
+    return px
 
 
+# Loading Data
+DATA_FILES = {
+    "daily": 'assets/daily_swim_summary.csv',
+    "laps": 'assets/aggregated_swim_data.csv'
+}
 
 
-# Loading Data
 def load_data():
-    data = pd.read_csv('assets/daily_swim_summary.csv')
+    data = pd.read_csv(DATA_FILES["daily"])
     data["date"] = pd.to_datetime(data["date"])
     data["date_display"] = data["date"].dt.strftime("%Y-%m-%d")
     
     data["year"] = data["date"].dt.year
+    data["stroke_mask"] = daily_stroke_masks(data)
 
-    return data
+    return data.sort_values(by="date", kind="stable").reset_index(drop=True)
 
 
-def load_aggregate_data():
-    agg_data = pd.read_csv('assets/aggregated_swim_data.csv')
-    agg_data["date"] = agg_data["date"]
+def load_aggregate_data(data):
+    agg_data = link_workouts(clean_lap_data(pd.read_csv(DATA_FILES["laps"])), data)[0]
     agg_data.set_index("date", inplace=True, drop=False)
     return agg_data
 
 
-data = load_data()
-agg_data = load_aggregate_data()
+# Stroke Bitmasks
+# Each stroke is one bit, so the strokes a workout used fit in one uint8 that is worked out once
+# at ingest. A stroke filter is then a single bitwise test over the daily rows, the laps or the
+# lap summary instead of string matching on the comma-joined swim_stroke column.
+STROKES = ["backstroke", "breaststroke", "butterfly", "freestyle", "im", "mixed"]
+STROKE_BITS = {stroke: 1 << position for position, stroke in enumerate(STROKES)}
+STROKE_FILTER_MODES = {"any": "Any of these", "all": "All of these", "only": "Only these"}
+
+
+def stroke_label(stroke):
+    return "IM" if stroke == "im" else stroke.title()
+
+
+def stroke_bits(strokes):
+    # Rest laps and strokes the dashboard doesn't track get no bit
+    return strokes.map(STROKE_BITS).fillna(0).to_numpy(dtype=np.uint8)
+
+
+def daily_stroke_masks(data):
+    masks = np.zeros(len(data), dtype=np.uint8)
+    listed = data["swim_stroke"].fillna("").str.lower()
+    for stroke, bit in STROKE_BITS.items():
+        used = listed.str.contains(rf"\b{stroke}\b").to_numpy()
+        if stroke in data:
+            used = used | (pd.to_numeric(data[stroke], errors="coerce").fillna(0).to_numpy() > 0)
+        masks[used] |= bit
+    return masks
+
+
+def encode_stroke_filter(strokes, mode):
+    if not strokes:
+        return None
+    return {"mask": int(sum(STROKE_BITS[stroke] for stroke in set(strokes) if stroke in STROKE_BITS)), "mode": mode if mode in STROKE_FILTER_MODES else "any"}
+
+
+def stroke_filter_match(masks, stroke_filter):
+    masks = np.asarray(masks, dtype=np.uint8)
+    if not stroke_filter:
+        return np.ones(len(masks), dtype=bool)
+    bits = np.uint8(stroke_filter["mask"])
+    if stroke_filter["mode"] == "all":
+        return (masks & bits) == bits
+    if stroke_filter["mode"] == "only":
+        return (masks != 0) & ((masks & ~bits) == 0)
+    return (masks & bits) != 0
+
+
+def describe_stroke_filter(stroke_filter):
+    names = [stroke_label(stroke) for stroke, bit in STROKE_BITS.items() if stroke_filter["mask"] & bit]
+    return f"{STROKE_FILTER_MODES[stroke_filter['mode']]}: {', '.join(names)}"
+
+
+# Lap Cleaning
+# Runs once at ingest so callbacks never have to re-filter or re-coerce lap rows
+LAP_INTEGER_COLUMNS = ["message_index", "total_cycles", "num_lengths", "first_length_index", "num_active_lengths"]
+LAP_FLOAT_COLUMNS = [
+    "total_elapsed_time", "total_timer_time", "total_distance", "avg_heart_rate", "max_heart_rate",
+    "avg_cadence", "max_cadence", "avg_stroke_distance", "min_heart_rate", "enhanced_avg_speed"
+]
+# Watch exports write local wall-clock start times like "10/13/2025, 05:08:38 AM". They carry
+# no offset, so unless SWIM_TIMEZONE names the watch's zone they are read as UTC.
+LAP_START_FORMAT = "%m/%d/%Y, %I:%M:%S %p"
+LAP_TIMEZONE = os.environ.get("SWIM_TIMEZONE", "UTC")
+
+
+def clean_lap_data(laps):
+    # Exported message indexes look like "[0]"
+    laps["message_index"] = laps["message_index"].astype(str).str.strip("[] ")
+
+    for column in LAP_INTEGER_COLUMNS:
+        laps[column] = pd.to_numeric(laps[column], errors="coerce").round().astype("Int64")
+    for column in LAP_FLOAT_COLUMNS:
+        laps[column] = pd.to_numeric(laps[column], errors="coerce")
+
+    laps["swim_stroke"] = laps["swim_stroke"].str.strip().str.lower()
+    laps["stroke_bit"] = stroke_bits(laps["swim_stroke"])
+    laps["lap_date"] = pd.to_datetime(laps["date"], format="%m/%d/%Y", errors="coerce")
+    start_time = pd.to_datetime(laps["start_time"], format=LAP_START_FORMAT, errors="coerce")
+    # The hour repeated when daylight saving ends is read as standard time
+    laps["start_time"] = start_time.dt.tz_localize(LAP_TIMEZONE, ambiguous=np.zeros(len(laps), dtype=bool), nonexistent="shift_forward")
+
+    # Laps without a usable date or start time can't be placed in a workout
+    laps = laps.dropna(subset=["lap_date", "start_time"])
+    laps = laps.drop_duplicates(subset=["start_time", "message_index"], keep="first")
+
+    laps["total_distance"] = laps["total_distance"].fillna(0).clip(lower=0)
+    is_rest = laps["swim_stroke"].isna() | (laps["total_distance"] <= 0)
+    laps["lap_type"] = np.where(is_rest, "rest", "active")
+    # Rest laps have no strokes, so their empty cycle counts are really zero
+    laps.loc[is_rest, "total_cycles"] = laps.loc[is_rest, "total_cycles"].fillna(0)
+
+    return laps.reset_index(drop=True)
+
+
+# Laps only carry their date, so each one is matched to a daily row by its session: a session
+# starts when the date changes or the message index restarts, and the nth session of a day
+# belongs to that day's nth workout. The carry is the (date, message index, session) of the
+# previous chunk's last lap, so sessions can span chunks. Laps with no matching workout get <NA>.
+def lap_sessions(dates, message_index, carry=None):
+    carry_date, carry_index, carry_session = carry if carry is not None else (np.datetime64("NaT"), np.nan, 0)
+
+    previous_dates = np.concatenate([[carry_date], dates[:-1]]).astype(dates.dtype)
+    previous_index = np.concatenate([[carry_index], message_index[:-1]])
+    new_day = dates != previous_dates
+    starts = new_day | (message_index <= previous_index)
+
+    started = np.cumsum(starts)
+    run = np.cumsum(new_day)
+    day_base = np.concatenate([[0], started[new_day]])
+    # Laps before the first new day continue the carried day's session count
+    return np.where(run > 0, started - day_base[run], carry_session + started)
+
+
+def link_workouts(laps, data, carry=None):
+    dates = laps["lap_date"].to_numpy()
+    message_index = laps["message_index"].to_numpy(dtype=float, na_value=np.nan)
+    session = lap_sessions(dates, message_index, carry)
+
+    workouts = data.sort_values(["date", "workout_id"], kind="stable")
+    workout_keys = pd.MultiIndex.from_arrays([workouts["date"].to_numpy(), workouts.groupby("date").cumcount().to_numpy()])
+    positions = workout_keys.get_indexer(pd.MultiIndex.from_arrays([dates, session]))
+    workout_ids = workouts["workout_id"].to_numpy()
+    laps["workout_id"] = pd.array(np.where(positions >= 0, workout_ids[positions], 0), dtype="Int64")
+    laps.loc[positions < 0, "workout_id"] = pd.NA
+
+    if len(laps):
+        carry = (dates[-1], message_index[-1], int(session[-1]))
+    return laps, carry
+
+
+# Exports keep the start time in the watch's text format, since Excel has no time zones
+def lap_export_frame(laps):
+    return laps.assign(start_time=laps["start_time"].dt.strftime(LAP_START_FORMAT))
+
+
+# Memory-Bounded Lap Aggregation
+# With SWIM_MEMORY_LIMIT_MB set, a lap history whose estimated in-memory size is over the
+# ceiling is never loaded whole. Stroke totals, per-workout sums and exports stream over
+# chunks sized to fit, and only the small per-day stroke summary stays resident.
+MEMORY_LIMIT_MB = float(os.environ["SWIM_MEMORY_LIMIT_MB"]) if os.environ.get("SWIM_MEMORY_LIMIT_MB") else None
+LAP_SAMPLE_ROWS = 1000
+MIN_LAP_CHUNK_ROWS = 1000
+
+
+def plan_lap_chunks():
+    if MEMORY_LIMIT_MB is None:
+        return None
+
+    path = DATA_FILES["laps"]
+    sample = pd.read_csv(path, nrows=LAP_SAMPLE_ROWS)
+    if sample.empty:
+        return None
+
+    # Estimate the row count from how many bytes the sampled rows take up in the file
+    with open(path, "rb") as lap_file:
+        sample_bytes = sum(len(lap_file.readline()) for _ in range(len(sample) + 1))
+    estimated_rows = os.path.getsize(path) / (sample_bytes / (len(sample) + 1))
+    bytes_per_row = sample.memory_usage(deep=True).sum() / len(sample)
+
+    memory_limit = MEMORY_LIMIT_MB * 1024 ** 2
+    # Cleaning holds a couple of copies of the table at once
+    if estimated_rows * bytes_per_row * 2 <= memory_limit:
+        return None
+    # A raw chunk and its cleaned copy get a quarter of the ceiling
+    return max(MIN_LAP_CHUNK_ROWS, int(memory_limit / 4 / (bytes_per_row * 2)))
+
+
+def iter_lap_chunks(dataset):
+    if dataset.agg_data is not None:
+        return [dataset.agg_data]
+    return read_lap_chunks(dataset.lap_chunk_size, dataset.data)
+
+
+def read_lap_chunks(chunk_size, data):
+    # Laps repeated across chunks are caught by their hashed (start_time, message_index) key
+    seen = []
+    carry = None
+    for chunk in pd.read_csv(DATA_FILES["laps"], chunksize=chunk_size):
+        chunk = clean_lap_data(chunk)
+        fresh, seen = unseen_keys(lap_keys(chunk["start_time"], chunk["message_index"]), seen)
+        chunk, carry = link_workouts(chunk[fresh].reset_index(drop=True), data, carry)
+        yield chunk
+
+
+# Hashes depend on dtype, so the message index is always hashed as float64 however it was parsed
+def lap_keys(start_times, message_indexes):
+    return pd.util.hash_pandas_object(pd.DataFrame({
+        "start_time": start_times,
+        "message_index": pd.to_numeric(message_indexes).astype("float64")
+    }), index=False).to_numpy()
+
+
+# Marks the keys not already seen or earlier in the batch, and returns the grown seen runs. Seen
+# keys are kept as sorted runs, each at least as long as the next: a lookup is one binary search
+# per run, and a key is only re-sorted when its run merges with one as large, so a full scan
+# costs O(n log² n) instead of re-sorting every key seen so far for each chunk.
+def unseen_keys(keys, seen):
+    fresh = ~pd.Series(keys).duplicated().to_numpy()
+    for run in filter(len, seen):
+        positions = np.minimum(np.searchsorted(run, keys), len(run) - 1)
+        fresh &= run[positions] != keys
+    runs = list(seen)
+    added = np.sort(keys[fresh])
+    while runs and len(runs[-1]) <= len(added):
+        added = np.sort(np.concatenate([runs.pop(), added]), kind="stable")
+    if len(added):
+        runs.append(added)
+    return fresh, runs
+
+
+# Returns the per (day, workout, stroke) distance summary and the per-workout lap structure.
+# Every column is a sum, so chunks can be summarized one at a time and combined.
+def summarize_laps(chunks):
+    parts = []
+    structures = []
+    for chunk in chunks:
+        active = chunk[chunk["lap_type"] == "active"]
+        parts.append(active.groupby(["lap_date", "workout_id", "swim_stroke"], as_index=False, dropna=False).agg(
+            total_distance=("total_distance", "sum"),
+            laps=("total_distance", "size")
+        ))
+        is_active = chunk["lap_type"] == "active"
+        structures.append(pd.DataFrame({
+            "workout_id": chunk["workout_id"],
+            "active_laps": is_active.astype(int),
+            "active_distance": chunk["total_distance"].where(is_active, 0.0),
+            "active_distance_squared": (chunk["total_distance"] ** 2).where(is_active, 0.0),
+            "rest_time": chunk["total_elapsed_time"].where(~is_active, 0.0).fillna(0.0),
+            "lap_time": chunk["total_elapsed_time"].fillna(0.0)
+        }).groupby("workout_id").sum())
+    if not parts:
+        summary = pd.DataFrame({"lap_date": pd.Series(dtype="datetime64[ns]"), "workout_id": pd.Series(dtype="Int64"), "swim_stroke": pd.Series(dtype=str), "total_distance": pd.Series(dtype=float), "laps": pd.Series(dtype=int)})
+        return summary, pd.DataFrame(columns=LAP_STRUCTURE_COLUMNS, index=pd.Index([], dtype="Int64", name="workout_id"), dtype=float)
+    summary = pd.concat(parts).groupby(["lap_date", "workout_id", "swim_stroke"], as_index=False, dropna=False).sum()
+    structure = pd.concat(structures).groupby(level="workout_id").sum().sort_index()
+    return summary.sort_values(by="lap_date", kind="stable").reset_index(drop=True), structure
+
+
+LAP_STRUCTURE_COLUMNS = ["active_laps", "active_distance", "active_distance_squared", "rest_time", "lap_time"]
+
+
+# Returns (agg_data, lap_summary, lap_structure, lap_chunk_size); the chunk size is None while the whole lap table is resident
+def load_lap_tables(data):
+    chunk_size = plan_lap_chunks()
+    if chunk_size is None:
+        agg_data = load_aggregate_data(data)
+        return (agg_data, *summarize_laps([agg_data]), None)
+    return (None, *summarize_laps(read_lap_chunks(chunk_size, data)), chunk_size)
+
+
+# Each table is versioned by its file's mtime and size, so a version check is just a stat() call
+def file_version(path):
+    stat = os.stat(path)
+    return f"{stat.st_mtime_ns:x}-{stat.st_size:x}"
+
+
+def current_versions():
+    return {name: file_version(path) for name, path in DATA_FILES.items()}
+
+
+# Dataset Snapshots
+# Everything loaded for one set of file versions lives in a single immutable Dataset. A reload
+# builds a complete new one and publishes it with one assignment, so a request keeps reading a
+# consistent set of tables even while another worker thread swaps in the next version. Published
+# frames are never modified in place, and pandas copy-on-write keeps frames derived from them
+# from writing back.
+Dataset = namedtuple("Dataset", [
+    "versions",
+    "data",
+    "agg_data",
+    "lap_summary",
+    "lap_structure",
+    "lap_chunk_size",
+    "yoy_pivot",
+    "daily_lineage",
+    "similarity_index",
+    # Memoized views, filled on first use. Two threads racing to fill one just build the same value twice.
+    "unit_views",
+    "indexes"
+])
+
+current_dataset = None
+_reload_lock = threading.Lock()
+
+
+# Reload only the tables whose files changed, keeping the rest from the previous dataset
+def build_dataset(versions, previous):
+    appended = True
+    if versions["daily"] == previous.versions["daily"]:
+        data, yoy_pivot, daily_lineage = previous.data, previous.yoy_pivot, previous.daily_lineage
+    else:
+        data = load_data()
+        appended = is_append_only(previous.data, data)
+        yoy_pivot = next_yoy_pivot(previous.yoy_pivot if appended else None, data)
+        daily_lineage = next_daily_lineage(previous.daily_lineage if appended else {}, versions["daily"], len(data))
+
+    # Laps are linked to workouts through the daily table, so they are relinked whenever it changes
+    if versions["laps"] == previous.versions["laps"] and data is previous.data:
+        lap_tables = previous.agg_data, previous.lap_summary, previous.lap_structure, previous.lap_chunk_size
+    else:
+        lap_tables = load_lap_tables(data)
+
+    lap_structure = lap_tables[2]
+    if data is previous.data and lap_structure is previous.lap_structure:
+        similarity_index = previous.similarity_index
+    elif appended and lap_structure_kept(previous.lap_structure, lap_structure, previous.data):
+        similarity_index = extend_similarity_index(previous.similarity_index, data.iloc[previous.similarity_index["rows"]:], lap_structure)
+    else:
+        similarity_index = build_similarity_index(data, lap_structure)
+
+    return Dataset(versions, data, *lap_tables, yoy_pivot, daily_lineage, similarity_index, {}, {})
+
+
+# Returns the current dataset, publishing a new one first if any file changed
+def refresh_data():
+    global current_dataset
+
+    dataset = current_dataset
+    if current_versions() == dataset.versions:
+        return dataset
+
+    # One thread reloads while the others wait and then pick up what it published
+    with _reload_lock:
+        versions = current_versions()
+        if versions != current_dataset.versions:
+            current_dataset = build_dataset(versions, current_dataset)
+        return current_dataset
+
+
+# Sorted date indexes
+# Frames are kept sorted by date next to their datetime64 values, so any date range
+# resolves to a contiguous slice with two binary searches
+def build_date_index(frame, dates):
+    order = np.argsort(dates, kind="stable")
+    return {
+        "frame": frame.iloc[order].reset_index(drop=True),
+        "dates": dates[order]
+    }
+
+
+def date_range_slice(dates, start=None, end=None):
+    lo = 0 if start is None else np.searchsorted(dates, np.datetime64(start), side="left")
+    # The end date is inclusive, so search for the first entry on the following day
+    hi = len(dates) if end is None else np.searchsorted(dates, np.datetime64(end + pd.Timedelta(days=1)), side="left")
+    return int(lo), int(max(lo, hi))
+
+
+def get_date_index(name, dataset=None):
+    if dataset is None:
+        dataset = refresh_data()
+    index = dataset.indexes.get(name)
+    if index is None:
+        if name == "workouts":
+            index = build_date_index(dataset.data, dataset.data["date"].to_numpy())
+        else:
+            index = build_date_index(dataset.agg_data.reset_index(drop=True), dataset.agg_data["lap_date"].to_numpy())
+        dataset.indexes[name] = index
+    return index
+
+
+# Laps sorted by workout and start time, so each workout's laps are one contiguous row range
+def build_workout_index(laps):
+    frame = laps.reset_index(drop=True).sort_values(["workout_id", "start_time"], kind="stable", na_position="last")
+    return {
+        "frame": frame.reset_index(drop=True),
+        "workout_ids": frame["workout_id"].to_numpy(dtype=float, na_value=np.nan)
+    }
+
+
+def workout_lap_range(index, workout_id):
+    lo = np.searchsorted(index["workout_ids"], workout_id, side="left")
+    hi = np.searchsorted(index["workout_ids"], workout_id, side="right")
+    return int(lo), int(hi)
+
+
+def get_workout_index(dataset):
+    index = dataset.indexes.get("workout_laps")
+    if index is None:
+        index = build_workout_index(dataset.agg_data)
+        dataset.indexes["workout_laps"] = index
+    return index
+
+
+# Year-over-Year Pivot
+# Distance per (year, day of year) and its running total, kept with each dataset. When new
+# workouts are only appended, the previous pivot is extended instead of being rebuilt from
+# the whole history.
+YOY_DAYS = 366
+
+
+def day_of_year_index(dates):
+    # Every year is laid on a leap-year calendar so the same date always lines up
+    dates = pd.DatetimeIndex(dates)
+    return (dates.dayofyear + ((~dates.is_leap_year) & (dates.month > 2))).to_numpy() - 1
+
+
+def add_to_yoy_pivot(pivot, daily):
+    rows = np.searchsorted(pivot["years"], daily["year"].to_numpy())
+    days = day_of_year_index(daily["date"])
+    np.add.at(pivot["totals"], (rows, days), daily["total_distance"].to_numpy())
+
+    # Only each touched year's running total from its earliest new day onward changes
+    for row in np.unique(rows):
+        first_day = days[rows == row].min()
+        carried = pivot["cumulative"][row, first_day - 1] if first_day > 0 else 0.0
+        pivot["cumulative"][row, first_day:] = carried + pivot["totals"][row, first_day:].cumsum()
+
+
+def build_yoy_pivot(daily):
+    years = np.sort(daily["year"].unique())
+    pivot = {
+        "years": years,
+        "totals": np.zeros((len(years), YOY_DAYS)),
+        "cumulative": np.zeros((len(years), YOY_DAYS)),
+        "rows": 0,
+        "last_date": None
+    }
+    extend_yoy_pivot(pivot, daily)
+    return pivot
+
+
+def extend_yoy_pivot(pivot, new_rows):
+    if new_rows.empty:
+        return pivot
+
+    years = np.union1d(pivot["years"], new_rows["year"].unique())
+    if len(years) != len(pivot["years"]):
+        # A new season needs its own rows, everything else is kept as is
+        existing = np.searchsorted(years, pivot["years"])
+        for name in ("totals", "cumulative"):
+            grown = np.zeros((len(years), YOY_DAYS))
+            grown[existing] = pivot[name]
+            pivot[name] = grown
+        pivot["years"] = years
+
+    add_to_yoy_pivot(pivot, new_rows)
+    pivot["rows"] += len(new_rows)
+    last_date = new_rows["date"].max()
+    pivot["last_date"] = last_date if pivot["last_date"] is None else max(pivot["last_date"], last_date)
+    return pivot
+
+
+def is_append_only(previous, current):
+    count = len(previous)
+    if len(current) < count:
+        return False
+    head = current.iloc[:count]
+    return (
+        np.array_equal(head["date"].to_numpy(), previous["date"].to_numpy()) and
+        np.array_equal(head["total_distance"].to_numpy(), previous["total_distance"].to_numpy())
+    )
+
+
+# Only pass the previous pivot when the new table just appends to the rows it was built from
+def next_yoy_pivot(pivot, data):
+    if pivot is None or pivot["rows"] > len(data):
+        return build_yoy_pivot(data)
+    # The previous dataset may still be serving requests, so extend a copy
+    pivot = {**pivot, "totals": pivot["totals"].copy(), "cumulative": pivot["cumulative"].copy()}
+    return extend_yoy_pivot(pivot, data.iloc[pivot["rows"]:])
+
+
+# Append Lineage
+# Row counts of recent daily versions whose rows are all still a prefix of the current table.
+# A client showing one of these versions only needs the rows after that count.
+MAX_DAILY_LINEAGE = 50
+
+
+# Pass an empty lineage when the new table does not just append to the previous one
+def next_daily_lineage(lineage, version, row_count):
+    lineage = {**lineage, version: row_count}
+    while len(lineage) > MAX_DAILY_LINEAGE:
+        lineage.pop(next(iter(lineage)))
+    return lineage
+
+
+def appended_daily_offset(dataset, previous_version):
+    offset = dataset.daily_lineage.get(previous_version)
+    if offset is None or offset >= len(dataset.data):
+        return None
+    return offset
+
+
+# Similar Workouts
+# Each workout is described by its stroke mix, distance, duration, intensity and lap structure.
+# The index keeps the raw feature rows with running sums, so features are standardized at
+# query time and new workouts only append rows instead of rebuilding the whole matrix.
+SIMILARITY_FEATURES = {
+    "stroke mix": ["backstroke", "breaststroke", "butterfly", "freestyle", "im", "mixed"],
+    "distance": ["total_distance"],
+    "duration": ["total_elapsed_time"],
+    "intensity": ["pace", "max_heart_rate"],
+    "lap structure": ["active_laps", "mean_lap_distance", "lap_distance_spread", "rest_share"]
+}
+# Every group counts the same however many columns it has
+SIMILARITY_WEIGHTS = np.concatenate([np.full(len(columns), 1 / len(columns)) for columns in SIMILARITY_FEATURES.values()])
+SIMILAR_WORKOUTS = 5
+
+
+def workout_features(daily, lap_structure):
+    laps = lap_structure.reindex(daily["workout_id"].to_numpy())
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # The per-stroke columns count laps, so the mix is each stroke's share of them
+        stroke_laps = daily[SIMILARITY_FEATURES["stroke mix"]].to_numpy(dtype=float)
+        stroke_mix = stroke_laps / stroke_laps.sum(axis=1, keepdims=True)
+
+        active_laps = laps["active_laps"].to_numpy(dtype=float)
+        mean_lap_distance = laps["active_distance"].to_numpy() / active_laps
+        lap_distance_spread = np.sqrt(np.maximum(laps["active_distance_squared"].to_numpy() / active_laps - mean_lap_distance ** 2, 0))
+        features = np.column_stack([
+            stroke_mix,
+            daily["total_distance"].to_numpy(dtype=float),
+            daily["total_elapsed_time"].to_numpy(dtype=float),
+            daily["total_elapsed_time"].to_numpy() / daily["total_distance"].to_numpy() * 100,
+            daily["max_heart_rate"].to_numpy(dtype=float),
+            active_laps,
+            mean_lap_distance,
+            lap_distance_spread,
+            laps["rest_time"].to_numpy() / laps["lap_time"].to_numpy()
+        ])
+    # Missing values are left out of the running sums and treated as average when comparing
+    features[~np.isfinite(features)] = np.nan
+    return features
+
+
+def build_similarity_index(daily, lap_structure):
+    width = len(SIMILARITY_WEIGHTS)
+    index = {
+        "features": np.empty((0, width)),
+        "sums": np.zeros(width),
+        "squares": np.zeros(width),
+        "counts": np.zeros(width),
+        "rows": 0
+    }
+    return extend_similarity_index(index, daily, lap_structure)
+
+
+# Returns a new index, since the previous dataset may still be querying the old one
+def extend_similarity_index(index, new_rows, lap_structure):
+    features = workout_features(new_rows, lap_structure)
+    present = ~np.isnan(features)
+    filled = np.where(present, features, 0.0)
+    return {
+        "features": np.vstack([index["features"], features]),
+        "sums": index["sums"] + filled.sum(axis=0),
+        "squares": index["squares"] + (filled ** 2).sum(axis=0),
+        "counts": index["counts"] + present.sum(axis=0),
+        "rows": index["rows"] + len(new_rows)
+    }
+
+
+# True when every workout already in the index still has the same laps
+def lap_structure_kept(previous, current, previous_daily):
+    if previous is current:
+        return True
+    workout_ids = previous_daily["workout_id"].to_numpy()
+    return previous.reindex(workout_ids).equals(current.reindex(workout_ids))
+
+
+def similar_workouts(dataset, position, count=SIMILAR_WORKOUTS):
+    index = dataset.similarity_index
+    counts = np.maximum(index["counts"], 1)
+    mean = index["sums"] / counts
+    spread = np.sqrt(np.maximum(index["squares"] / counts - mean ** 2, 0))
+    spread[spread == 0] = 1
+
+    scaled = np.nan_to_num((index["features"] - mean) / spread)
+    distances = ((scaled - scaled[position]) ** 2 * SIMILARITY_WEIGHTS).sum(axis=1)
+    # Only workouts swum before this one are compared; a day's workouts follow their workout ids
+    dates = dataset.data["date"].to_numpy()
+    workout_ids = dataset.data["workout_id"].to_numpy()
+    later = (dates > dates[position]) | ((dates == dates[position]) & (workout_ids >= workout_ids[position]))
+    distances[later] = np.inf
+
+    count = min(count, int((~later).sum()))
+    if count <= 0:
+        return np.empty(0, dtype=int), np.empty(0)
+    nearest = np.argpartition(distances, count - 1)[:count]
+    nearest = nearest[np.argsort(distances[nearest], kind="stable")]
+    return nearest, distances[nearest]
+
+
+# User Settings
+DEFAULT_SETTINGS = {
+    "distance_units": "yards",
+    "refresh_frequency": "never",
+    "theme_selector": "dark_blue"
+}
+
+# Stored distances are in meters (a 25 yard length is stored as 22.86); every unit system is
+# derived from them, and miles are pool miles of 1650 yards
+UNIT_SYSTEMS = {
+    "yards": {"distance_label": "yards", "distance_factor": 1 / 0.9144, "long_label": "miles", "long_divisor": 1650},
+    "meters": {"distance_label": "meters", "distance_factor": 1.0, "long_label": "kilometers", "long_divisor": 1000}
+}
+
+
+# The daily CSV's own miles and minutes columns for new rows. The watch export fills its miles
+# column with the stored distance over 1650, so new rows do the same; views never read it.
+def stored_summary_columns(total_distance, total_elapsed_time):
+    return {
+        "total_distance_miles": total_distance / UNIT_SYSTEMS["yards"]["long_divisor"],
+        "total_time_minutes": total_elapsed_time / 60
+    }
+
+THEMES = {
+    "dark_blue": {"name": "Dark Blue Theme", "background": "#282a54", "text": "#e0e1e5"},
+    "ocean": {"name": "Ocean Blue Theme", "background": "#1b4f72", "text": "#e0e1e5"},
+    "forest": {"name": "Forest Green Theme", "background": "#1e4d2b", "text": "#e0e1e5"},
+    "midnight": {"name": "Midnight Black Theme", "background": "#121212", "text": "#e0e1e5"},
+    "sunset": {"name": "Sunset Orange Theme", "background": "#b9541f", "text": "#fdf2e9"},
+    "purple": {"name": "Purple Haze Theme", "background": "#4a235a", "text": "#e0e1e5"},
+    "light": {"name": "Light Mode Theme", "background": "#f4f5f7", "text": "#282a54"}
+}
+
+
+def resolve_settings(settings):
+    resolved = dict(DEFAULT_SETTINGS)
+    if settings:
+        resolved.update({key: value for key, value in settings.items() if key in DEFAULT_SETTINGS and value is not None})
+    if resolved["distance_units"] not in UNIT_SYSTEMS:
+        resolved["distance_units"] = DEFAULT_SETTINGS["distance_units"]
+    if resolved["theme_selector"] not in THEMES:
+        resolved["theme_selector"] = DEFAULT_SETTINGS["theme_selector"]
+    return resolved
+
+
+# Unit-aware derived views, computed once per unit system and dataset and shared by every callback
+
+
+# Only the points change between date ranges, so the styled figure is built once per unit system
+_yardage_shells = {}
+
+
+def build_yardage_figure(daily, system):
+    shell = _yardage_shells.get(system["distance_label"])
+    if shell is None:
+        fig = plotly_express().line(
+            x="date",
+            y="distance",
+            data_frame=daily.iloc[:0],
+            labels={
+                "date": "Workout Date",
+                "distance": f"Total Distance ({system['distance_label']})"
+            }
+        )
+        
+        # Make background transparent
+        fig.update_layout(
+            paper_bgcolor='rgba(0,0,0,0)',
+            plot_bgcolor='rgba(0,0,0,0)',
+            font=dict(color='#e0e1e5'),
+            xaxis=dict(
+                showgrid=True,
+                gridcolor='rgba(128,128,128,0.2)'
+            ),
+            yaxis=dict(
+                showgrid=True,
+                gridcolor='rgba(128,128,128,0.2)'
+            )
+        )
+        shell = _yardage_shells[system["distance_label"]] = fig.to_dict()
+    
+    # Plain lists instead of typed arrays, so appended workouts can be pushed with a Patch
+    x, y = yardage_points(daily)
+    return {"data": [{**shell["data"][0], "x": x, "y": y}], "layout": shell["layout"]}
+
+
+def yardage_points(daily):
+    return daily["date"].dt.strftime("%Y-%m-%d").tolist(), daily["distance"].tolist()
+
+
+def build_yoy_figure(yoy_pivot, system):
+    fig = go.Figure()
+    # Plot every season against one leap-year calendar
+    calendar = pd.date_range("2000-01-01", periods=YOY_DAYS)
+    last_date = yoy_pivot["last_date"]
+    for row, year in enumerate(yoy_pivot["years"]):
+        cumulative = yoy_pivot["cumulative"][row] * system["distance_factor"]
+        if last_date is not None and year == last_date.year:
+            # Stop the latest season at its most recent workout instead of running flat to December
+            cumulative = cumulative[:day_of_year_index([last_date])[0] + 1]
+        fig.add_trace(go.Scatter(
+            x=calendar[:len(cumulative)],
+            y=cumulative,
+            mode="lines",
+            name=str(year),
+            hovertemplate=f"%{{x|%b %d}} {year}: %{{y:,.0f}} {system['distance_label']}<extra></extra>"
+        ))
+
+    fig.update_layout(
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='#e0e1e5'),
+        xaxis=dict(
+            title="Day of Year",
+            tickformat="%b",
+            showgrid=True,
+            gridcolor='rgba(128,128,128,0.2)'
+        ),
+        yaxis=dict(
+            title=f"Cumulative Distance ({system['distance_label']})",
+            showgrid=True,
+            gridcolor='rgba(128,128,128,0.2)'
+        ),
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
+    )
+
+    return fig
+
+
+def build_table_records(daily):
+    # The table keeps its column ids, so swap the converted values in place
+    return daily.assign(
+        total_distance=daily["distance"],
+        total_distance_miles=daily["distance_long"]
+    ).drop(columns=["distance", "distance_long", "hours", "minutes", "stroke_mask"]).to_dict("records")
+
+
+def build_unit_view(dataset, units):
+    system = UNIT_SYSTEMS[units]
+
+    data = dataset.data
+    daily = data.copy()
+    daily["distance"] = data["total_distance"] * system["distance_factor"]
+    daily["distance_long"] = daily["distance"] / system["long_divisor"]
+    daily["hours"] = data["total_elapsed_time"] / 3600
+    daily["minutes"] = data["total_elapsed_time"] / 60
+
+    laps = dataset.lap_summary.copy()
+    laps["distance"] = laps["total_distance"] * system["distance_factor"]
+    # Each summary row carries its workout's strokes, so a stroke filter picks whole workouts
+    laps["workout_mask"] = laps["workout_id"].map(pd.Series(data["stroke_mask"].to_numpy(), index=data["workout_id"])).fillna(0).to_numpy(dtype=np.uint8)
+
+    table_order = daily.sort_values(by="date_display", ascending=False)
+    table_records = build_table_records(table_order)
+
+    return {
+        "units": units,
+        "distance_label": system["distance_label"],
+        "long_label": system["long_label"],
+        "daily": daily,
+        "daily_dates": daily["date"].to_numpy(),
+        "laps": laps,
+        "lap_dates": laps["lap_date"].to_numpy(),
+        "table_records": table_records,
+        "table_stroke_masks": table_order["stroke_mask"].to_numpy(),
+        # Stored as plain dicts, which are much cheaper to unpickle from the boot snapshot than Figures
+        "yardage_figure": build_yardage_figure(daily, system),
+        "yoy_figure": build_yoy_figure(dataset.yoy_pivot, system).to_dict()
+    }
+
+
+def get_unit_view(units, dataset=None):
+    if dataset is None:
+        dataset = refresh_data()
+    if units not in UNIT_SYSTEMS:
+        units = DEFAULT_SETTINGS["distance_units"]
+    view = dataset.unit_views.get(units)
+    if view is None:
+        view = build_unit_view(dataset, units)
+        dataset.unit_views[units] = view
+    return view
+
+
+# Overview Date Range
+# Seasons run September through August
+SEASON_START_MONTH = 9
+
+
+def season_bounds(season_year):
+    start = pd.Timestamp(season_year, SEASON_START_MONTH, 1)
+    return start, start + pd.DateOffset(years=1) - pd.Timedelta(days=1)
+
+
+def date_range_options(data):
+    season_years = data["date"].dt.year - (data["date"].dt.month < SEASON_START_MONTH)
+    return (
+        [{"label": "All Time", "value": "all"}, {"label": "Last 4 Weeks", "value": "last_4_weeks"}] +
+        [{"label": f"{year}-{str(year + 1)[-2:]} Season", "value": f"season_{year}"} for year in sorted(season_years.unique(), reverse=True)] +
+        [{"label": "Custom", "value": "custom"}]
+    )
+
+
+def resolve_date_range(preset, start_date=None, end_date=None):
+    start = end = None
+    if preset == "last_4_weeks":
+        end = pd.Timestamp.today().normalize()
+        start = end - pd.Timedelta(days=27)
+    elif preset and preset.startswith("season_"):
+        start, end = season_bounds(int(preset.split("_", 1)[1]))
+    elif preset == "custom":
+        start = pd.Timestamp(start_date) if start_date else None
+        end = pd.Timestamp(end_date) if end_date else None
+    return {
+        "start": start.strftime("%Y-%m-%d") if start is not None else None,
+        "end": end.strftime("%Y-%m-%d") if end is not None else None
+    }
+
+
+def parse_date_range(date_range):
+    date_range = date_range or {}
+    start = pd.Timestamp(date_range["start"]) if date_range.get("start") else None
+    end = pd.Timestamp(date_range["end"]) if date_range.get("end") else None
+    return start, end
+
+
+# Every overview component reads from the same contiguous slice of the unit view
+def slice_unit_view(view, start=None, end=None):
+    lo, hi = date_range_slice(view["daily_dates"], start, end)
+    lap_lo, lap_hi = date_range_slice(view["lap_dates"], start, end)
+    return view["daily"].iloc[lo:hi], view["laps"].iloc[lap_lo:lap_hi]
+
+
+# Workout Drill-Down
+# Per-lap pace, stroke count and heart rate for one workout, drawn with WebGL traces. Long
+# sessions are decimated on the server so no trace sends more than DRILLDOWN_MAX_POINTS.
+DRILLDOWN_MAX_POINTS = 1500
+
+
+def lttb_indices(x, y, threshold):
+    # Largest-Triangle-Three-Buckets: keep the point in each bucket that best preserves the shape
+    count = len(x)
+    if count <= threshold or threshold < 3:
+        return np.arange(count)
+
+    edges = np.linspace(1, count - 1, threshold - 1).astype(int)
+    selected = np.empty(threshold, dtype=int)
+    selected[0] = 0
+    anchor = 0
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        next_end = edges[bucket + 2] if bucket + 2 < len(edges) else count
+        next_x = x[end:next_end].mean()
+        next_y = y[end:next_end].mean()
+        area = np.abs(
+            (x[anchor] - next_x) * (y[start:end] - y[anchor]) -
+            (x[anchor] - x[start:end]) * (next_y - y[anchor])
+        )
+        anchor = start + int(np.argmax(area))
+        selected[bucket + 1] = anchor
+    selected[-1] = count - 1
+    return selected
+
+
+def workout_laps(dataset, workout_id):
+    if dataset.agg_data is None:
+        laps = pd.concat([chunk[(chunk["workout_id"] == workout_id).fillna(False)] for chunk in iter_lap_chunks(dataset)])
+        return laps.sort_values("start_time", kind="stable")
+    index = get_workout_index(dataset)
+    lo, hi = workout_lap_range(index, workout_id)
+    return index["frame"].iloc[lo:hi]
+
+
+# The daily row for a workout id, or None when it isn't in the view
+def find_workout(view, workout_id):
+    positions = np.flatnonzero(view["daily"]["workout_id"].to_numpy() == workout_id)
+    return view["daily"].iloc[positions[0]] if len(positions) else None
+
+
+# Dropdown options for the given workouts; a second swim on the same day is numbered
+def workout_options(daily):
+    swim_number = daily.groupby("date_display").cumcount().to_numpy() + 1
+    return [
+        {"label": date if number == 1 else f"{date} (swim {number})", "value": int(workout_id)}
+        for date, number, workout_id in zip(daily["date_display"], swim_number, daily["workout_id"])
+    ]
+
+
+def build_drilldown_figure(laps, system, title=""):
+    fig = make_subplots(rows=3, cols=1, shared_xaxes=True, vertical_spacing=0.06)
+
+    # Rest laps still take time, so lap start times include them
+    start_minutes = laps["total_elapsed_time"].fillna(0).cumsum().shift(fill_value=0).to_numpy() / 60
+    active = (laps["lap_type"] == "active").to_numpy()
+    distance = laps["total_distance"].to_numpy() * system["distance_factor"]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pace = laps["total_timer_time"].to_numpy() / distance * 100
+        strokes = laps["total_cycles"].astype(float).to_numpy() / laps["num_active_lengths"].astype(float).to_numpy()
+    heart_rate = laps["avg_heart_rate"].astype(float).to_numpy()
+
+    series = [
+        (f"Pace (sec/100 {system['distance_label']})", pace, "#4fc3f7"),
+        ("Strokes/Length", strokes, "#ffb74d"),
+        ("Avg Heart Rate", heart_rate, "#e57373")
+    ]
+    for row, (name, values, color) in enumerate(series, start=1):
+        valid = active & np.isfinite(values)
+        x, y = start_minutes[valid], values[valid]
+        keep = lttb_indices(x, y, DRILLDOWN_MAX_POINTS)
+        fig.add_trace(go.Scattergl(
+            x=x[keep],
+            y=y[keep],
+            mode="lines+markers",
+            name=name,
+            line=dict(color=color),
+            marker=dict(size=5),
+            hovertemplate=f"%{{x:.1f}} min: %{{y:,.1f}}<extra>{name}</extra>"
+        ), row=row, col=1)
+        fig.update_yaxes(title_text=name, row=row, col=1, showgrid=True, gridcolor='rgba(128,128,128,0.2)')
+
+    fig.update_xaxes(showgrid=True, gridcolor='rgba(128,128,128,0.2)')
+    fig.update_xaxes(title_text="Minutes Into Workout", row=3, col=1)
+    fig.update_layout(
+        title=title,
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='#e0e1e5'),
+        showlegend=False,
+        height=600,
+        margin=dict(t=40 if title else 20)
+    )
+    return fig
+
+
+# Fast Boot
+# The prepared tables, unit views (with their initial figures) and date indexes are pickled
+# next to the app and reused while the CSVs and this file are unchanged. Set SWIM_FAST_BOOT=0
+# to always derive them from the CSVs.
+FAST_BOOT = os.environ.get("SWIM_FAST_BOOT", "1") != "0"
+BOOT_SNAPSHOT_PATH = os.environ.get("SWIM_BOOT_SNAPSHOT", ".boot_snapshot.pkl")
+BOOT_SNAPSHOT_FORMAT = 8
+
+
+def source_version():
+    with open(__file__, "rb") as source:
+        return hashlib.sha1(source.read()).hexdigest()
+
+
+def boot_snapshot_key():
+    return {
+        "format": BOOT_SNAPSHOT_FORMAT,
+        "code": source_version(),
+        "pandas": pd.__version__,
+        "plotly": plotly.__version__,
+        "memory_limit": MEMORY_LIMIT_MB,
+        "timezone": LAP_TIMEZONE,
+        "versions": current_versions()
+    }
+
+
+def load_boot_snapshot(key):
+    try:
+        with open(BOOT_SNAPSHOT_PATH, "rb") as snapshot_file:
+            # The key is stored first so a stale snapshot is rejected without unpickling the frames
+            if pickle.load(snapshot_file) != key:
+                return None
+            return pickle.load(snapshot_file)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+        return None
+
+
+def save_boot_snapshot(key, state):
+    temp_path = f"{BOOT_SNAPSHOT_PATH}.{os.getpid()}.tmp"
+    try:
+        with open(temp_path, "wb") as snapshot_file:
+            pickle.dump(key, snapshot_file, protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.dump(state, snapshot_file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, BOOT_SNAPSHOT_PATH)
+    except OSError as err:
+        print(f"Could not write boot snapshot: {err}", file=sys.stderr)
+
+
+def warm_caches(dataset):
+    for units in UNIT_SYSTEMS:
+        get_unit_view(units, dataset)
+    get_date_index("workouts", dataset)
+    if dataset.agg_data is not None:
+        get_date_index("laps", dataset)
+        get_workout_index(dataset)
+
+
+def boot():
+    global current_dataset
+
+    key = boot_snapshot_key()
+    state = load_boot_snapshot(key) if FAST_BOOT else None
+    if state is not None:
+        current_dataset = Dataset(**state)
+        startup_stage("load boot snapshot")
+        return
+
+    versions = key["versions"]
+    data = load_data()
+    yoy_pivot = build_yoy_pivot(data)
+    startup_stage("load daily summary")
+    lap_tables = load_lap_tables(data)
+    startup_stage("load and clean laps")
+
+    similarity_index = build_similarity_index(data, lap_tables[2])
+    daily_lineage = next_daily_lineage({}, versions["daily"], len(data))
+    dataset = Dataset(versions, data, *lap_tables, yoy_pivot, daily_lineage, similarity_index, {}, {})
+    warm_caches(dataset)
+    current_dataset = dataset
+    startup_stage("derive views and figures")
+
+    if FAST_BOOT:
+        save_boot_snapshot(key, dataset._asdict())
+        startup_stage("write boot snapshot")
+
+
+boot()
 
 
 external_stylesheets = [
@@ -43,6 +1106,1008 @@ app = dash.Dash(__name__, external_stylesheets=external_stylesheets, suppress_ca
 server = app.server
 
 
+# Callback Profiling
+# Set SWIM_PROFILE_CALLBACKS to callback names (comma separated, or "all") to write a cProfile
+# trace of each matching callback request to SWIM_PROFILE_DIR. With SWIM_PROFILE_TOKEN set, a
+# single request can opt in by sending the token in an X-Swim-Profile header, so one user's slow
+# call can be traced on a live server. Open the .pstats files with snakeviz or python -m pstats.
+PROFILE_CALLBACKS = {name.strip() for name in os.environ.get("SWIM_PROFILE_CALLBACKS", "").split(",") if name.strip()}
+PROFILE_TOKEN = os.environ.get("SWIM_PROFILE_TOKEN")
+PROFILE_DIR = os.environ.get("SWIM_PROFILE_DIR", "profiles")
+
+
+def profiled_callback_name():
+    if not request.path.endswith("_dash-update-component"):
+        return None
+    body = request.get_json(silent=True) or {}
+    callback = app.callback_map.get(body.get("output"), {}).get("callback")
+    name = getattr(callback, "__name__", None) or str(body.get("output", "callback"))
+
+    token = request.headers.get("X-Swim-Profile")
+    if PROFILE_TOKEN and token and hmac.compare_digest(token, PROFILE_TOKEN):
+        return name
+    if "all" in PROFILE_CALLBACKS or name in PROFILE_CALLBACKS:
+        return name
+    return None
+
+
+@server.before_request
+def start_callback_profile():
+    # Without a flag or token this is the only work done per request
+    if not PROFILE_CALLBACKS and not PROFILE_TOKEN:
+        return
+    name = profiled_callback_name()
+    if name is None:
+        return
+    g.callback_profile = (name, cProfile.Profile())
+    g.callback_profile[1].enable()
+
+
+@server.teardown_request
+def write_callback_profile(error):
+    if "callback_profile" not in g:
+        return
+    name, profiler = g.pop("callback_profile")
+    profiler.disable()
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    safe_name = "".join(char if char.isalnum() or char in "_-" else "_" for char in name)[:80]
+    path = os.path.join(PROFILE_DIR, f"{datetime.now():%Y%m%d-%H%M%S}-{safe_name}-{os.getpid()}-{time.time_ns() % 10**9}.pstats")
+    profiler.dump_stats(path)
+    print(f"Profiled {name} -> {path}", file=sys.stderr)
+
+
+# Lightweight version endpoint polled by the auto-refresh interval. It is also the one check the
+# browser cache (assets/client_cache.js) makes before answering callbacks from IndexedDB, so it
+# carries the code version too: responses cached by an older build are never reused.
+CODE_VERSION = hashlib.sha1(f"{source_version()}:{dash.__version__}:{plotly.__version__}".encode()).hexdigest()[:16]
+
+
+@server.route("/api/version")
+def dataset_version():
+    response = jsonify({**refresh_data().versions, "code": CODE_VERSION})
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+
+# Read-only query API
+# Date ranges resolve through the sorted date indexes; every other filter only looks at the resulting slice
+API_DEFAULT_LIMIT = 100
+API_MAX_LIMIT = 1000
+
+class QueryError(ValueError):
+    pass
+
+
+def parse_date_arg(name):
+    value = request.args.get(name)
+    if not value:
+        return None
+    try:
+        return pd.Timestamp(value).normalize()
+    except ValueError:
+        raise QueryError(f"'{name}' must be an ISO date (YYYY-MM-DD)")
+
+
+def parse_float_arg(name):
+    value = request.args.get(name)
+    if value is None or value == "":
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        raise QueryError(f"'{name}' must be a number")
+
+
+def encode_cursor(version, position):
+    return base64.urlsafe_b64encode(f"{version}:{position}".encode()).decode()
+
+
+def decode_cursor(cursor, version):
+    try:
+        cursor_version, position = base64.urlsafe_b64decode(cursor.encode()).decode().rsplit(":", 1)
+        position = int(position)
+    except ValueError:
+        raise QueryError("'cursor' is not valid")
+    if cursor_version != version:
+        raise QueryError("'cursor' refers to an older version of the data, restart from the first page")
+    return position
+
+
+def parse_query(columns):
+    query = {
+        "start": parse_date_arg("start"),
+        "end": parse_date_arg("end"),
+        "min_distance": parse_float_arg("min_distance"),
+        "max_distance": parse_float_arg("max_distance"),
+        "stroke": request.args.get("stroke")
+    }
+    if query["stroke"] is not None and query["stroke"] not in STROKES:
+        raise QueryError(f"'stroke' must be one of {', '.join(STROKES)}")
+
+    try:
+        limit = int(request.args.get("limit", API_DEFAULT_LIMIT))
+    except ValueError:
+        raise QueryError("'limit' must be an integer")
+    query["limit"] = min(max(limit, 1), API_MAX_LIMIT)
+
+    fields = request.args.get("fields")
+    if fields:
+        fields = [field.strip() for field in fields.split(",") if field.strip()]
+        unknown = [field for field in fields if field not in columns]
+        if unknown:
+            raise QueryError(f"Unknown fields: {', '.join(unknown)}")
+    else:
+        fields = list(columns)
+    query["fields"] = fields
+    return query
+
+
+def query_mask(name, window, query):
+    mask = np.ones(len(window), dtype=bool)
+    if query["min_distance"] is not None:
+        mask &= window["total_distance"].to_numpy() >= query["min_distance"]
+    if query["max_distance"] is not None:
+        mask &= window["total_distance"].to_numpy() <= query["max_distance"]
+    if query["stroke"] is not None:
+        bits = window["stroke_mask" if name == "workouts" else "stroke_bit"].to_numpy()
+        mask &= (bits & STROKE_BITS[query["stroke"]]) != 0
+    return mask
+
+
+def query_table(name, dataset, version):
+    if name == "laps" and dataset.agg_data is None:
+        return query_lap_chunks(dataset, version)
+
+    index = get_date_index(name, dataset)
+    frame = index["frame"]
+    query = parse_query(frame.columns)
+
+    lo, hi = date_range_slice(index["dates"], query["start"], query["end"])
+    cursor = request.args.get("cursor")
+    if cursor:
+        lo = max(lo, min(decode_cursor(cursor, version), hi))
+
+    window = frame.iloc[lo:hi]
+    positions = np.flatnonzero(query_mask(name, window, query))
+    page_positions = positions[:query["limit"]]
+    next_cursor = None
+    if len(positions) > query["limit"]:
+        next_cursor = encode_cursor(version, lo + int(page_positions[-1]) + 1)
+
+    page = window.iloc[page_positions][query["fields"]]
+    return page.to_json(orient="records", date_format="iso"), next_cursor
+
+
+# In memory-bounded mode laps are scanned chunk by chunk, and the cursor is a row position in the cleaned stream
+def query_lap_chunks(dataset, version):
+    cursor = request.args.get("cursor")
+    first_position = decode_cursor(cursor, version) if cursor else 0
+
+    query = None
+    pages = []
+    matched = 0
+    next_cursor = None
+    position = 0
+    for chunk in iter_lap_chunks(dataset):
+        if query is None:
+            query = parse_query(chunk.columns)
+
+        mask = query_mask("laps", chunk, query)
+        mask &= np.arange(position, position + len(chunk)) >= first_position
+        lap_dates = chunk["lap_date"].to_numpy()
+        if query["start"] is not None:
+            mask &= lap_dates >= np.datetime64(query["start"])
+        if query["end"] is not None:
+            mask &= lap_dates < np.datetime64(query["end"] + pd.Timedelta(days=1))
+
+        hits = np.flatnonzero(mask)
+        needed = query["limit"] - matched
+        if len(hits) > needed:
+            pages.append(chunk.iloc[hits[:needed]][query["fields"]])
+            next_cursor = encode_cursor(version, position + int(hits[needed]))
+            break
+        pages.append(chunk.iloc[hits][query["fields"]])
+        matched += len(hits)
+        position += len(chunk)
+
+    if not pages:
+        return "[]", None
+    return pd.concat(pages).to_json(orient="records", date_format="iso"), next_cursor
+
+
+# version_keys lists every file the payload is built from, the table's own file first. Lap
+# rows carry the workout_id they were linked to, so they also change with the daily file.
+def query_response(name, version_keys):
+    dataset = refresh_data()
+    version = dataset.versions[version_keys[0]]
+    # The payload is fully determined by the file versions and the query string
+    versions = "/".join(str(dataset.versions[key]) for key in version_keys)
+    etag = hashlib.sha1(f"{versions}?{request.query_string.decode()}".encode()).hexdigest()
+    last_modified = datetime.fromtimestamp(max(os.stat(DATA_FILES[key]).st_mtime for key in version_keys), tz=timezone.utc)
+
+    if request.if_none_match.contains(etag):
+        response = server.response_class(status=304)
+    else:
+        try:
+            items, next_cursor = query_table(name, dataset, version)
+        except QueryError as err:
+            return jsonify({"error": str(err)}), 400
+        body = f'{{"items": {items}, "next_cursor": {json.dumps(next_cursor)}}}'
+        response = server.response_class(body, mimetype="application/json")
+
+    response.set_etag(etag)
+    response.last_modified = last_modified
+    response.headers["Cache-Control"] = "no-cache"
+    return response.make_conditional(request)
+
+
+@server.route("/api/workouts")
+def api_workouts():
+    return query_response("workouts", ("daily",))
+
+
+@server.route("/api/laps")
+def api_laps():
+    return query_response("laps", ("laps", "daily"))
+
+
+# Data Writes
+# Imports and live syncs are the only routes that change the CSVs. Both need the shared secret in
+# SWIM_WRITE_TOKEN, sent in an X-Swim-Write-Token header, and are turned off while it is unset.
+# Writers hold a file lock as well as a thread lock, so worker processes never interleave a sync
+# append with an import that replaces the same file.
+WRITE_TOKEN = os.environ.get("SWIM_WRITE_TOKEN")
+DATA_LOCK_PATH = os.environ.get("SWIM_DATA_LOCK", ".data.lock")
+
+_write_lock = threading.Lock()
+
+
+def write_authorized():
+    token = request.headers.get("X-Swim-Write-Token")
+    return bool(WRITE_TOKEN and token and hmac.compare_digest(token.encode(), WRITE_TOKEN.encode()))
+
+
+def write_forbidden():
+    return jsonify({"error": "Send the SWIM_WRITE_TOKEN value in an X-Swim-Write-Token header"}), 403
+
+
+@contextmanager
+def data_write_lock():
+    with _write_lock, open(DATA_LOCK_PATH, "a") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        yield
+
+
+# Bulk Import
+# Uploads arrive as the raw request body and are streamed straight to a temporary file. The
+# file is then read back in chunks, validated, and appended to copies of the CSVs, which
+# replace the originals once everything is written. Memory stays bounded by the chunk size
+# however large the upload is.
+IMPORT_DIR = os.environ.get("SWIM_IMPORT_DIR", "imports")
+IMPORT_CHUNK_ROWS = 20000
+IMPORT_BLOCK_BYTES = 1024 * 1024
+IMPORT_EXTENSIONS = (".csv", ".xlsx")
+DAILY_REQUIRED_COLUMNS = ["date", "total_distance", "total_elapsed_time"]
+LAP_REQUIRED_COLUMNS = ["message_index", "start_time", "date", "total_distance", "total_elapsed_time"]
+CSV_READ_ERRORS = (pd.errors.ParserError, pd.errors.EmptyDataError, UnicodeDecodeError)
+
+
+class ImportRejected(ValueError):
+    pass
+
+
+def import_table_kind(columns):
+    columns = set(columns)
+    # Laps carry every daily column too, so check for them first
+    if columns.issuperset(LAP_REQUIRED_COLUMNS):
+        return "laps"
+    if columns.issuperset(DAILY_REQUIRED_COLUMNS):
+        return "daily"
+    return None
+
+
+# Yields (table, chunk) pairs; an XLSX export holds one table per sheet
+def read_import_chunks(path):
+    if path.endswith(".csv"):
+        try:
+            kind = import_table_kind(pd.read_csv(path, nrows=0).columns)
+            if kind is None:
+                raise ImportRejected("The CSV does not look like a daily summary or a lap export")
+            for chunk in pd.read_csv(path, chunksize=IMPORT_CHUNK_ROWS, dtype=str, keep_default_na=False):
+                yield kind, chunk.replace("", np.nan)
+        except CSV_READ_ERRORS as err:
+            raise ImportRejected(f"The CSV could not be read: {err}") from err
+        return
+
+    import openpyxl
+    from openpyxl.utils.exceptions import InvalidFileException
+
+    # Read-only workbooks parse one row at a time instead of loading every cell
+    try:
+        workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    except (zipfile.BadZipFile, InvalidFileException, KeyError) as err:
+        # KeyError is how openpyxl reports a zip without the workbook's parts
+        raise ImportRejected("The file is not a readable Excel workbook") from err
+    try:
+        for sheet in workbook.worksheets:
+            rows = sheet.iter_rows(values_only=True)
+            header = next(rows, None)
+            kind = import_table_kind(header or [])
+            if kind is None:
+                continue
+            batch = []
+            for row in rows:
+                batch.append(row)
+                if len(batch) == IMPORT_CHUNK_ROWS:
+                    yield kind, pd.DataFrame(batch, columns=header)
+                    batch = []
+            if batch:
+                yield kind, pd.DataFrame(batch, columns=header)
+    finally:
+        workbook.close()
+
+
+def validate_daily_chunk(chunk, columns):
+    dates = pd.to_datetime(chunk["date"], format="ISO8601", errors="coerce")
+    distance = pd.to_numeric(chunk["total_distance"], errors="coerce")
+    elapsed = pd.to_numeric(chunk["total_elapsed_time"], errors="coerce")
+    valid = (dates.notna() & (distance >= 0) & (elapsed >= 0)).to_numpy()
+
+    rows = chunk[valid].reindex(columns=columns)
+    rows["date"] = dates[valid].dt.strftime("%Y-%m-%d")
+    rows["total_distance"] = distance[valid]
+    rows["total_elapsed_time"] = elapsed[valid]
+    rows = rows.assign(**stored_summary_columns(rows["total_distance"], rows["total_elapsed_time"]))
+    rows[STROKES] = rows[STROKES].fillna(0)
+    return rows, int((~valid).sum())
+
+
+def validate_lap_chunk(chunk, columns):
+    message_index = pd.to_numeric(chunk["message_index"].astype(str).str.strip("[] "), errors="coerce")
+    dates = pd.to_datetime(chunk["date"], format="%m/%d/%Y", errors="coerce")
+    start_time = chunk["start_time"].astype(str).str.strip()
+    distance = pd.to_numeric(chunk["total_distance"], errors="coerce")
+    valid = (
+        message_index.notna() & dates.notna() & chunk["start_time"].notna() & (start_time != "") &
+        ~(distance < 0)
+    ).to_numpy()
+
+    rows = chunk[valid].reindex(columns=columns)
+    rows["message_index"] = "[" + message_index[valid].astype(int).astype(str) + "]"
+    rows["start_time"] = start_time[valid]
+    rows["date"] = dates[valid].dt.strftime("%m/%d/%Y")
+    return rows, int((~valid).sum())
+
+
+def daily_keys(daily):
+    return pd.util.hash_pandas_object(pd.DataFrame({
+        "date": daily["date"].astype(str),
+        "total_distance": pd.to_numeric(daily["total_distance"]).astype(float).round(2),
+        "total_elapsed_time": pd.to_numeric(daily["total_elapsed_time"]).astype(float).round(1)
+    }), index=False).to_numpy()
+
+
+def existing_import_keys():
+    daily_seen = []
+    lap_seen = []
+    daily_dates = set()
+    next_workout_id = 1
+    lap_carry = None
+    for chunk in pd.read_csv(DATA_FILES["daily"], usecols=[*DAILY_REQUIRED_COLUMNS, "workout_id"], chunksize=IMPORT_CHUNK_ROWS):
+        _, daily_seen = unseen_keys(daily_keys(chunk), daily_seen)
+        daily_dates.update(chunk["date"])
+        if not chunk.empty:
+            next_workout_id = max(next_workout_id, int(chunk["workout_id"].max()) + 1)
+    for chunk in pd.read_csv(DATA_FILES["laps"], usecols=["start_time", "message_index", "date"], dtype=str, chunksize=IMPORT_CHUNK_ROWS):
+        message_index = pd.to_numeric(chunk["message_index"].str.strip("[] "), errors="coerce")
+        _, lap_seen = unseen_keys(lap_keys(chunk["start_time"], message_index), lap_seen)
+        # Appended laps continue the session numbering of the file's last laps
+        dates = pd.to_datetime(chunk["date"], format="%m/%d/%Y", errors="coerce").to_numpy()
+        sessions = lap_sessions(dates, message_index.to_numpy(dtype=float), lap_carry)
+        if len(chunk):
+            lap_carry = (dates[-1], float(message_index.iloc[-1]), int(sessions[-1]))
+    return daily_seen, lap_seen, daily_dates, next_workout_id, lap_carry
+
+
+# Per-session totals of imported laps, so sessions on days without a daily row can each get one.
+# Sessions are numbered as link_workouts numbers them, with the carry continuing across chunks.
+def summarize_imported_laps(laps, first_position, carry=None):
+    laps = clean_lap_data(laps)
+    dates = laps["lap_date"].to_numpy()
+    message_index = laps["message_index"].to_numpy(dtype=float, na_value=np.nan)
+    laps["session"] = lap_sessions(dates, message_index, carry)
+    if len(laps):
+        carry = (dates[-1], message_index[-1], int(laps["session"].iloc[-1]))
+
+    sessions = laps.groupby(["lap_date", "session"]).agg(
+        total_distance=("total_distance", "sum"),
+        total_elapsed_time=("total_elapsed_time", "sum"),
+        max_heart_rate=("max_heart_rate", "max"),
+        num_lengths=("num_lengths", "sum")
+    )
+    active = laps[laps["lap_type"] == "active"].assign(position=np.arange(first_position, first_position + (laps["lap_type"] == "active").sum()))
+    strokes = active.groupby(["lap_date", "session", "swim_stroke"]).agg(laps=("position", "size"), first=("position", "min"))
+    return sessions, strokes, carry
+
+
+# One row per session, in date and session order, so new workout ids follow the order laps link in
+def daily_rows_from_laps(session_parts, stroke_parts, known_dates, columns):
+    if not session_parts:
+        return pd.DataFrame(columns=columns)
+    sessions = pd.concat(session_parts).groupby(level=["lap_date", "session"]).agg({
+        "total_distance": "sum",
+        "total_elapsed_time": "sum",
+        "max_heart_rate": "max",
+        "num_lengths": "sum"
+    })
+    dates = sessions.index.get_level_values("lap_date")
+    sessions = sessions[~dates.strftime("%Y-%m-%d").isin(known_dates)]
+    if sessions.empty:
+        return pd.DataFrame(columns=columns)
+
+    strokes = pd.concat(stroke_parts).groupby(level=["lap_date", "session", "swim_stroke"]).agg({"laps": "sum", "first": "min"}).reset_index()
+    # Strokes are listed in the order they were first swum, like the existing summaries
+    stroke_names = strokes.sort_values("first").groupby(["lap_date", "session"])["swim_stroke"].agg(", ".join)
+    stroke_laps = strokes.pivot(index=["lap_date", "session"], columns="swim_stroke", values="laps").reindex(columns=STROKES)
+
+    rows = sessions.assign(
+        date=sessions.index.get_level_values("lap_date").strftime("%Y-%m-%d"),
+        swim_stroke=stroke_names.reindex(sessions.index),
+        **stored_summary_columns(sessions["total_distance"], sessions["total_elapsed_time"]),
+        **{stroke: stroke_laps[stroke].reindex(sessions.index).fillna(0).astype(int) for stroke in STROKES}
+    )
+    return rows.reset_index(drop=True).reindex(columns=columns)
+
+
+def stage_table(name):
+    path = DATA_FILES[name]
+    staged = f"{path}.{os.getpid()}.import"
+    shutil.copyfile(path, staged)
+    end_with_newline(staged)
+    return staged
+
+
+# Appended rows must start on a fresh line
+def end_with_newline(path):
+    with open(path, "rb+") as table_file:
+        table_file.seek(0, os.SEEK_END)
+        if table_file.tell() > 0:
+            table_file.seek(-1, os.SEEK_END)
+            if table_file.read(1) != b"\n":
+                table_file.write(b"\n")
+
+
+def import_file(path):
+    with data_write_lock():
+        daily_columns = pd.read_csv(DATA_FILES["daily"], nrows=0).columns.tolist()
+        lap_columns = pd.read_csv(DATA_FILES["laps"], nrows=0).columns.tolist()
+        daily_seen, lap_seen, daily_dates, next_workout_id, lap_carry = existing_import_keys()
+        counts = {"workouts_added": 0, "laps_added": 0, "duplicates": 0, "rejected": 0}
+        session_parts, stroke_parts = [], []
+        found = False
+
+        staged = {name: stage_table(name) for name in DATA_FILES}
+        try:
+            with open(staged["daily"], "a", newline="") as daily_file, open(staged["laps"], "a", newline="") as lap_file:
+                for kind, chunk in read_import_chunks(path):
+                    found = True
+                    if kind == "daily":
+                        rows, rejected = validate_daily_chunk(chunk, daily_columns)
+                        fresh, daily_seen = unseen_keys(daily_keys(rows), daily_seen)
+                        rows = rows[fresh]
+                        rows["workout_id"] = np.arange(next_workout_id, next_workout_id + len(rows))
+                        next_workout_id += len(rows)
+                        daily_dates.update(rows["date"])
+                        rows.to_csv(daily_file, header=False, index=False)
+                        counts["workouts_added"] += len(rows)
+                    else:
+                        rows, rejected = validate_lap_chunk(chunk, lap_columns)
+                        fresh, lap_seen = unseen_keys(lap_keys(rows["start_time"], pd.to_numeric(rows["message_index"].str.strip("[] "))), lap_seen)
+                        rows = rows[fresh]
+                        rows.to_csv(lap_file, header=False, index=False)
+                        if not rows.empty:
+                            sessions, strokes, lap_carry = summarize_imported_laps(rows, counts["laps_added"], lap_carry)
+                            session_parts.append(sessions)
+                            stroke_parts.append(strokes)
+                        counts["laps_added"] += len(rows)
+                    counts["duplicates"] += int((~fresh).sum())
+                    counts["rejected"] += rejected
+
+                if not found:
+                    raise ImportRejected("No daily summary or lap table was found in the file")
+
+                # Each session of imported laps on a day without a workout row gets one built from its totals
+                derived = daily_rows_from_laps(session_parts, stroke_parts, daily_dates, daily_columns)
+                derived["workout_id"] = np.arange(next_workout_id, next_workout_id + len(derived))
+                derived.to_csv(daily_file, header=False, index=False)
+                counts["workouts_added"] += len(derived)
+
+            # Laps go first, so a reader never sees a workout whose laps are missing
+            for name in ("laps", "daily"):
+                if counts["laps_added" if name == "laps" else "workouts_added"]:
+                    os.replace(staged[name], DATA_FILES[name])
+        finally:
+            for staged_path in staged.values():
+                if os.path.exists(staged_path):
+                    os.remove(staged_path)
+        return counts
+
+
+@server.route("/api/import", methods=["POST"])
+def api_import():
+    if not write_authorized():
+        return write_forbidden()
+    filename = request.args.get("filename", "")
+    extension = os.path.splitext(filename)[1].lower()
+    if extension not in IMPORT_EXTENSIONS:
+        return jsonify({"error": f"Only {', '.join(IMPORT_EXTENSIONS)} files can be imported"}), 400
+
+    os.makedirs(IMPORT_DIR, exist_ok=True)
+    upload = tempfile.NamedTemporaryFile(dir=IMPORT_DIR, suffix=extension, delete=False)
+    try:
+        with upload:
+            while True:
+                block = request.stream.read(IMPORT_BLOCK_BYTES)
+                if not block:
+                    break
+                upload.write(block)
+        counts = import_file(upload.name)
+    except ImportRejected as err:
+        return jsonify({"error": str(err)}), 400
+    finally:
+        os.remove(upload.name)
+
+    response = jsonify(counts)
+    response.headers["Cache-Control"] = "no-store"
+    return response
+
+
+# Live Sync
+# A watch (or sync_daemon.py standing in for one) posts laps to /api/sync as a workout goes on.
+# New laps are appended to the lap CSV, and each session of the day that has no daily row yet
+# gets one built from its laps. A row built that way keeps following its session as more laps
+# arrive. A daily summary that came from anywhere else is left alone. Open dashboards hear about
+# each sync over server-sent events. Every event is encoded once into a short shared buffer,
+# so adding subscribers costs no extra work per sync. A stream holds a worker thread, so one is
+# only opened while laps are actually arriving, closes once they stop, and each process serves
+# at most SYNC_MAX_STREAMS of them; every other tab keeps to the version poll.
+SYNC_EVENT_BACKLOG = 100
+SYNC_POLL_SECONDS = 1
+SYNC_KEEPALIVE_SECONDS = 15
+SYNC_IDLE_SECONDS = 120
+SYNC_MAX_STREAMS = int(os.environ.get("SWIM_SYNC_MAX_STREAMS", "2"))
+
+_sync_condition = threading.Condition()
+_sync_events = []
+_sync_sequence = 0
+_sync_published_versions = None
+_sync_watcher = None
+_sync_streams = 0
+
+
+def publish_sync_event(payload):
+    global _sync_sequence, _sync_published_versions
+    encoded = f"data: {json.dumps(payload, default=str)}\n\n"
+    with _sync_condition:
+        _sync_sequence += 1
+        _sync_events.append((_sync_sequence, encoded))
+        del _sync_events[:-SYNC_EVENT_BACKLOG]
+        _sync_published_versions = payload["versions"]
+        _sync_condition.notify_all()
+
+
+# Syncs handled by another worker process only show up here as new file versions, so one
+# thread per process watches them and publishes on their behalf
+def watch_sync_versions():
+    while True:
+        time.sleep(SYNC_POLL_SECONDS)
+        versions = current_versions()
+        if versions != _sync_published_versions:
+            publish_sync_event({"versions": versions})
+
+
+def start_sync_watcher():
+    global _sync_watcher, _sync_published_versions
+    with _sync_condition:
+        if _sync_watcher is not None:
+            return
+        _sync_published_versions = current_versions()
+        _sync_watcher = threading.Thread(target=watch_sync_versions, name="sync-watcher", daemon=True)
+        _sync_watcher.start()
+
+
+# Laps were written recently, which is the only time a stream has anything to say
+def sync_active():
+    try:
+        return time.time() - os.path.getmtime(DATA_FILES["laps"]) < SYNC_IDLE_SECONDS
+    except OSError:
+        return False
+
+
+def release_sync_stream():
+    global _sync_streams
+    with _sync_condition:
+        _sync_streams -= 1
+
+
+def stream_sync_events():
+    with _sync_condition:
+        last_sequence = _sync_sequence
+    # The current versions go first, so a reconnecting tab catches up on anything it missed
+    yield f"retry: 5000\ndata: {json.dumps({'versions': current_versions()})}\n\n"
+    last_event = quiet_since = time.monotonic()
+    # Ending the stream hands the thread back; the browser's reconnect finds sync idle and stops
+    while time.monotonic() - last_event < SYNC_IDLE_SECONDS:
+        with _sync_condition:
+            _sync_condition.wait_for(lambda: _sync_sequence > last_sequence, timeout=SYNC_KEEPALIVE_SECONDS)
+            pending = [event for sequence, event in _sync_events if sequence > last_sequence]
+            last_sequence = _sync_sequence
+        if pending:
+            yield "".join(pending)
+            last_event = quiet_since = time.monotonic()
+        elif time.monotonic() - quiet_since >= SYNC_KEEPALIVE_SECONDS:
+            # Comment lines keep proxies from closing the stream and reveal closed tabs
+            yield ": keepalive\n\n"
+            quiet_since = time.monotonic()
+
+
+# Lap Day Index
+# A sync only needs the laps already stored for the days it touches. Each process remembers the
+# byte offset where each day's laps start and how far into the file it has indexed, so a sync
+# reads from its earliest day to the end of the file (for a live swim, just today's laps) and
+# only indexes lines appended since the last one. If the bytes before that point changed, the
+# file was rewritten rather than appended to and is indexed again from the top. The index is
+# only touched under data_write_lock.
+LAP_INDEX_CHECK_BYTES = 256
+_lap_day_index = {"path": None, "columns": [], "size": 0, "check": b"", "days": {}}
+
+
+def update_lap_day_index():
+    global _lap_day_index
+    path = DATA_FILES["laps"]
+    index = _lap_day_index
+    with open(path, "rb") as lap_file:
+        lap_file.seek(max(index["size"] - len(index["check"]), 0))
+        if index["path"] != path or lap_file.read(len(index["check"])) != index["check"]:
+            lap_file.seek(0)
+            header = lap_file.readline()
+            columns = next(csv.reader([header.decode()]))
+            index = {"path": path, "columns": columns, "size": len(header), "check": b"", "days": {}}
+
+        date_column = index["columns"].index("date")
+        offset = index["size"]
+        lap_file.seek(offset)
+        for line in lap_file:
+            # A torn last line is indexed once its writer finishes it
+            if not line.endswith(b"\n"):
+                break
+            fields = next(csv.reader([line.decode()]), [])
+            if len(fields) > date_column:
+                index["days"].setdefault(fields[date_column], offset)
+            offset += len(line)
+
+        lap_file.seek(max(offset - LAP_INDEX_CHECK_BYTES, 0))
+        index["check"] = lap_file.read(offset - lap_file.tell())
+        index["size"] = offset
+    _lap_day_index = index
+    return index
+
+
+def read_lap_days(days):
+    index = update_lap_day_index()
+    starts = [index["days"][day] for day in days if day in index["days"]]
+    if not starts:
+        return pd.DataFrame(columns=LAP_REQUIRED_COLUMNS)
+    with open(DATA_FILES["laps"], "rb") as lap_file:
+        lap_file.seek(min(starts))
+        laps = pd.read_csv(lap_file, names=index["columns"], header=None, dtype=str, keep_default_na=False)
+    return laps[laps["date"].isin(days)].replace("", np.nan)
+
+
+def raw_lap_sessions(laps):
+    dates = pd.to_datetime(laps["date"], format="%m/%d/%Y").to_numpy()
+    message_index = pd.to_numeric(laps["message_index"].str.strip("[] ")).to_numpy(dtype=float)
+    return lap_sessions(dates, message_index)
+
+
+def session_daily_row(laps, columns):
+    sessions, strokes, _ = summarize_imported_laps(laps.copy(), 0)
+    return daily_rows_from_laps([sessions], [strokes], set(), columns).iloc[0]
+
+
+def sync_laps(records):
+    if not isinstance(records, list) or not records or not all(isinstance(record, dict) for record in records):
+        raise ImportRejected("Send a JSON list of lap objects, or an object with a \"laps\" list")
+    chunk = pd.DataFrame.from_records(records)
+    if import_table_kind(chunk.columns) != "laps":
+        raise ImportRejected(f"Each lap needs {', '.join(LAP_REQUIRED_COLUMNS)}")
+
+    with data_write_lock():
+        daily_columns = pd.read_csv(DATA_FILES["daily"], nrows=0).columns.tolist()
+        lap_columns = pd.read_csv(DATA_FILES["laps"], nrows=0).columns.tolist()
+        rows, rejected = validate_lap_chunk(chunk, lap_columns)
+
+        # A lap's key includes its start time, so only the synced days can hold duplicates
+        before = read_lap_days(set(rows["date"]))
+        seen = [np.unique(lap_keys(before["start_time"], pd.to_numeric(before["message_index"].str.strip("[] "))))]
+        fresh, _ = unseen_keys(lap_keys(rows["start_time"], pd.to_numeric(rows["message_index"].str.strip("[] "))), seen)
+        rows = rows[fresh]
+        counts = {"laps_added": len(rows), "duplicates": int((~fresh).sum()), "rejected": rejected, "workouts_added": 0, "workouts_updated": 0}
+        if rows.empty:
+            return counts, None
+
+        end_with_newline(DATA_FILES["laps"])
+        # One write per sync, so a concurrent reader sees at most a torn last line, and the
+        # new file version makes it reload straight after
+        with open(DATA_FILES["laps"], "a", newline="") as lap_file:
+            lap_file.write(rows.to_csv(header=False, index=False))
+
+        after = pd.concat([before, rows], ignore_index=True)
+        before_sessions = raw_lap_sessions(before) if len(before) else np.empty(0, dtype=int)
+        after_sessions = raw_lap_sessions(after)
+        synced = set(zip(after["date"].to_numpy()[len(before):], after_sessions[len(before):]))
+
+        daily = pd.read_csv(DATA_FILES["daily"], dtype=str, keep_default_na=False)
+        workout_ids = pd.to_numeric(daily["workout_id"])
+        next_workout_id = int(workout_ids.max()) + 1 if len(daily) else 1
+        added = []
+        for lap_day, session in sorted(synced):
+            day = pd.to_datetime(lap_day, format="%m/%d/%Y").strftime("%Y-%m-%d")
+            day_rows = workout_ids[daily["date"] == day].sort_values().index
+            row = session_daily_row(after[(after["date"] == lap_day) & (after_sessions == session)], daily_columns)
+
+            if session >= len(day_rows):
+                row["workout_id"] = next_workout_id
+                next_workout_id += 1
+                added.append(row)
+                continue
+            # Only a row that still equals the session's earlier laps was built from them
+            earlier = before[(before["date"] == lap_day) & (before_sessions == session)]
+            if earlier.empty:
+                continue
+            current = daily.loc[day_rows[session]]
+            previous = session_daily_row(earlier, daily_columns)
+            if (np.isclose(float(current["total_distance"]), previous["total_distance"], atol=0.01) and
+                    np.isclose(float(current["total_elapsed_time"]), previous["total_elapsed_time"], atol=0.1)):
+                row["workout_id"] = current["workout_id"]
+                daily.loc[day_rows[session]] = row.astype(object).where(row.notna(), "").astype(str)
+                counts["workouts_updated"] += 1
+
+        counts["workouts_added"] = len(added)
+        if counts["workouts_updated"]:
+            staged = f"{DATA_FILES['daily']}.{os.getpid()}.sync"
+            daily.to_csv(staged, index=False)
+            if added:
+                pd.DataFrame(added, columns=daily_columns).to_csv(staged, mode="a", header=False, index=False)
+            os.replace(staged, DATA_FILES["daily"])
+        elif added:
+            end_with_newline(DATA_FILES["daily"])
+            with open(DATA_FILES["daily"], "a", newline="") as daily_file:
+                daily_file.write(pd.DataFrame(added, columns=daily_columns).to_csv(header=False, index=False))
+
+        laps = clean_lap_data(rows.copy())
+        payload = {
+            "versions": current_versions(),
+            "laps": json.loads(laps.assign(lap_date=laps["lap_date"].dt.strftime("%Y-%m-%d")).to_json(orient="records", date_format="iso"))
+        }
+    publish_sync_event(payload)
+    return counts, payload
+
+
+@server.route("/api/sync", methods=["POST"])
+def api_sync():
+    if not write_authorized():
+        return write_forbidden()
+    body = request.get_json(silent=True)
+    try:
+        counts, _ = sync_laps(body.get("laps") if isinstance(body, dict) else body)
+    except ImportRejected as err:
+        return jsonify({"error": str(err)}), 400
+    response = jsonify(counts)
+    response.headers["Cache-Control"] = "no-store"
+    return response
+
+
+# A 204 makes EventSource stop reconnecting, so the tab falls back to the version poll. Workers
+# without threads to spare (gunicorn's sync worker) never hold a stream.
+@server.route("/api/sync/events")
+def api_sync_events():
+    global _sync_streams
+    if not request.environ.get("wsgi.multithread") or not sync_active():
+        return Response(status=204)
+    with _sync_condition:
+        if _sync_streams >= SYNC_MAX_STREAMS:
+            return Response(status=204)
+        _sync_streams += 1
+    start_sync_watcher()
+    response = Response(stream_sync_events(), mimetype="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no"
+    })
+    response.call_on_close(release_sync_stream)
+    return response
+
+
+# Share Snapshots
+# Shared links point at a static page instead of the live app, so opening one never runs a Dash
+# callback. The link itself carries the view (signed with SWIM_SNAPSHOT_SECRET) and the newest
+# workout it covers, so any worker can rebuild the same page after a restart, a deploy or on
+# another dyno. Rendered pages are only a local cache, capped at SNAPSHOT_CACHE_LIMIT files.
+# Without the secret anyone could mint links that each force a render, so sharing then falls
+# back to the live page and no snapshot is served.
+SNAPSHOT_DIR = os.environ.get("SWIM_SNAPSHOT_DIR", "snapshots")
+SNAPSHOT_SECRET = os.environ.get("SWIM_SNAPSHOT_SECRET")
+SNAPSHOT_CACHE_LIMIT = int(os.environ.get("SWIM_SNAPSHOT_CACHE_LIMIT", "200"))
+PLOTLY_JS_URL = f"https://cdn.plot.ly/plotly-{plotly.offline.get_plotlyjs_version()}.min.js"
+
+SNAPSHOT_TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>{title}</title>
+<meta property="og:title" content="{title}">
+<meta property="og:description" content="{description}">
+<script src="{plotly_js}"></script>
+<style>
+body {{ margin: 0; padding: 30px; font-family: "Lexend Deca", sans-serif; background: {background}; color: {text}; }}
+h1 {{ font-size: 24px; margin: 0 0 5px; }}
+.subtitle {{ font-size: 14px; opacity: 0.8; margin-bottom: 25px; }}
+.cards {{ display: flex; flex-wrap: wrap; gap: 15px; margin-bottom: 25px; }}
+.card {{ flex: 1; min-width: 160px; padding: 12px; border-radius: 8px; background: rgba(255, 255, 255, 0.08); text-align: center; }}
+.card h6 {{ font-size: 12px; margin: 0 0 8px; font-weight: normal; }}
+.card h4 {{ font-size: 20px; margin: 0; }}
+.charts {{ display: flex; flex-wrap: wrap; gap: 15px; }}
+.chart {{ flex: 2; min-width: 320px; height: 420px; border-radius: 8px; background: rgba(255, 255, 255, 0.08); }}
+.chart.small {{ flex: 1; }}
+</style>
+</head>
+<body>
+<h1>{title}</h1>
+<div class="subtitle">{description}</div>
+<div class="cards">{cards}</div>
+<div class="charts">
+<div id="yardage_chart" class="chart"></div>
+<div id="stroke_chart" class="chart small"></div>
+</div>
+<script>
+Plotly.newPlot("yardage_chart", {yardage_figure}, {{displayModeBar: false, responsive: true}});
+Plotly.newPlot("stroke_chart", {stroke_figure}, {{displayModeBar: false, responsive: true}});
+</script>
+</body>
+</html>
+"""
+
+
+def snapshot_signature(payload):
+    return hmac.new(SNAPSHOT_SECRET.encode(), payload.encode(), hashlib.sha256).hexdigest()[:32]
+
+
+def snapshot_token(settings, date_range, workout, stroke_filter=None):
+    if not SNAPSHOT_SECRET:
+        return None
+    settings = resolve_settings(settings)
+    start, end = parse_date_range(date_range)
+    data = refresh_data().data
+    view = {
+        "units": settings["distance_units"],
+        "theme": settings["theme_selector"],
+        "start": start.strftime("%Y-%m-%d") if start is not None else None,
+        "end": end.strftime("%Y-%m-%d") if end is not None else None,
+        "workout": int(workout) if workout is not None else None,
+        "strokes": stroke_filter,
+        "through": int(data["workout_id"].max()) if len(data) else 0
+    }
+    payload = base64.urlsafe_b64encode(json.dumps(view, separators=(",", ":")).encode()).decode().rstrip("=")
+    return f"{payload}.{snapshot_signature(payload)}"
+
+
+# Returns the view a token describes, or None when it is forged or malformed
+def read_snapshot_token(token):
+    payload, _, signature = token.partition(".")
+    if not SNAPSHOT_SECRET or not hmac.compare_digest(signature.encode(), snapshot_signature(payload).encode()):
+        return None
+    try:
+        view = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+        start, end = parse_date_range(view)
+        strokes = view["strokes"]
+        valid = (
+            view["units"] in UNIT_SYSTEMS and view["theme"] in THEMES and
+            isinstance(view["through"], int) and isinstance(view["workout"], (int, type(None))) and
+            (strokes is None or (strokes["mode"] in STROKE_FILTER_MODES and 0 < int(strokes["mask"]) < 1 << len(STROKES)))
+        )
+    except (ValueError, TypeError, KeyError):
+        return None
+    return {**view, "start": start, "end": end} if valid else None
+
+
+def render_snapshot_html(snapshot):
+    theme = THEMES[snapshot["theme"]]
+    start, end, stroke_filter = snapshot["start"], snapshot["end"], snapshot["strokes"]
+    if start is None and end is None:
+        description = "All workouts"
+    else:
+        description = f"Workouts from {start.strftime('%b %d, %Y') if start is not None else 'the beginning'} to {end.strftime('%b %d, %Y') if end is not None else 'today'}"
+
+    if stroke_filter:
+        description = f"{description} · {describe_stroke_filter(stroke_filter)}"
+
+    view = get_unit_view(snapshot["units"])
+    daily, laps = filter_strokes(*slice_unit_view(view, start, end), stroke_filter)
+    # Workouts added after the link was made stay out of it
+    newer = (daily["workout_id"] > snapshot["through"]).to_numpy()
+    if newer.any():
+        daily = daily[~newer]
+        laps = laps[~(laps["workout_id"] > snapshot["through"]).fillna(False).to_numpy()]
+        yardage_figure = build_yardage_figure(daily, UNIT_SYSTEMS[view["units"]])
+    else:
+        yardage_figure = overview_yardage_figure(view, daily, start, end, stroke_filter)
+
+    cards = list(zip(
+        ["Workouts", "Time Spent Swimming", "Distance", "Average Time/Workout", "Average Distance/Workout"],
+        yearly_totals(view, daily, "all")
+    ))
+    workout = snapshot["workout"]
+    if workout is not None:
+        workout_date, workout_distance, workout_duration = workout_summary(view, workout)
+        cards = [("Workout", workout_date), ("Workout Distance", workout_distance), ("Workout Duration", workout_duration)] + cards
+
+    return SNAPSHOT_TEMPLATE.format(
+        title="My Swim Tracking Dashboard",
+        description=html_escape.escape(description),
+        plotly_js=PLOTLY_JS_URL,
+        background=theme["background"],
+        text=theme["text"],
+        cards="".join(
+            f'<div class="card"><h6>{html_escape.escape(label)}</h6><h4>{html_escape.escape(str(value))}</h4></div>'
+            for label, value in cards
+        ),
+        # Keep figure text from closing the inline script early
+        yardage_figure=plotly.io.to_json(yardage_figure, validate=False).replace("</", "<\\/"),
+        stroke_figure=plotly.io.to_json(build_stroke_pie(view, laps, workout), validate=False).replace("</", "<\\/")
+    )
+
+
+# Oldest rendered pages go first; any of them can be rebuilt from its link
+def prune_snapshots():
+    try:
+        names = [name for name in os.listdir(SNAPSHOT_DIR) if name.endswith(".html")]
+        if len(names) <= SNAPSHOT_CACHE_LIMIT:
+            return
+        paths = sorted((os.path.join(SNAPSHOT_DIR, name) for name in names), key=os.path.getmtime)
+        for path in paths[:len(paths) - SNAPSHOT_CACHE_LIMIT]:
+            os.remove(path)
+    except OSError:
+        # Another worker pruned the same files first
+        pass
+
+
+# Returns the cached page's file name, rendering it first when this worker has not yet
+def create_snapshot(token, snapshot):
+    name = f"{hashlib.sha1(token.encode()).hexdigest()}.html"
+    path = os.path.join(SNAPSHOT_DIR, name)
+    if not os.path.exists(path):
+        os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+        # Write to a temporary file first so a half-written snapshot is never served
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as snapshot_file:
+            snapshot_file.write(render_snapshot_html(snapshot))
+        os.replace(temp_path, path)
+        prune_snapshots()
+    return name
+
+
+@server.route("/snapshot/<token>")
+def serve_snapshot(token):
+    snapshot = read_snapshot_token(token)
+    if snapshot is None:
+        return jsonify({"error": "Snapshot not found"}), 404
+    response = send_from_directory(os.path.abspath(SNAPSHOT_DIR), create_snapshot(token, snapshot), max_age=31536000)
+    response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+    return response
+
+
 # Sidebar navigation
 sidebar = html.Div(
     [
@@ -93,6 +2158,34 @@ sidebar = html.Div(
             vertical=True,
             pills=True,
         ),
+        # Applies to every page, so it lives in the sidebar rather than on the overview
+        html.Div(
+            [
+                html.Hr(style={"borderColor": "#ddd"}),
+                html.Span("🏊 Strokes", style={"fontSize": "14px", "fontWeight": "bold", "color": "#e0e1e5"}),
+                dcc.Dropdown(
+                    id="stroke_filter_strokes",
+                    options=[{"label": stroke_label(stroke), "value": stroke} for stroke in STROKES],
+                    value=[],
+                    multi=True,
+                    placeholder="All strokes",
+                    persistence=True,
+                    persistence_type="session",
+                    style={"marginTop": "8px"}
+                ),
+                dcc.RadioItems(
+                    id="stroke_filter_mode",
+                    options=[{"label": label, "value": mode} for mode, label in STROKE_FILTER_MODES.items()],
+                    value="any",
+                    persistence=True,
+                    persistence_type="session",
+                    labelStyle={"display": "block", "fontSize": "13px", "color": "#e0e1e5"},
+                    inputStyle={"marginRight": "6px"},
+                    style={"marginTop": "8px"}
+                )
+            ],
+            style={"padding": "0 20px"}
+        ),
         html.Div(
             [
                 html.Hr(style={"borderColor": "#ddd"}),
@@ -133,193 +2226,278 @@ sidebar = html.Div(
 
 
 # Overview Content
-overview_content = html.Div([
-    dbc.Row([
-        dbc.Col([
-            dbc.Card([
-                dbc.CardBody([
-                    dcc.Dropdown(
-                        id="workout_filter",
-                        options=[{"label": date, "value": date} for date in data["date_display"].unique()],
-                        value=None,
-                        placeholder="Select a Workout"
-                    ),
-                ], style={"border": "1px solid #375050", "borderRadius": "8px"})
-            ])
-        ], width=3),
-        dbc.Col([
-            dbc.Card([
-                dbc.CardBody([
-                    html.Div([
-                        html.Span("🔆 Date:", style={"fontSize": "18px", "fontWeight": "bold", "marginRight": "10px", "color": "#e0e1e5"}),
-                        html.Span(id="workout_date", style={"fontSize": "18px", "fontWeight": "bold", "color": "#e0e1e5"})
-                    ], style={"display": "flex", "alignItems": "center"})
-                ], style={"padding": "5px", "height": "40px"})
-            ])
-        ], width=3),
-        dbc.Col([
-            dbc.Card([
-                dbc.CardBody([
-                    html.Div([
-                        html.Span("📈 Yardage: ", style={"fontSize": "18px", "fontWeight": "bold", "marginRight": "10px", "color": "#e0e1e5"}),
-                        html.Span(id="workout_yardage", style={"fontSize": "18px", "fontWeight": "bold", "color": "#e0e1e5"})
-                    ], style={"display": "flex", "alignItems": "center"})
-                ], style={"padding": "5px", "height": "40px"})
-            ])
-        ], width=3),
-        dbc.Col([
-            dbc.Card([
-                dbc.CardBody([
-                    html.Div([
-                        html.Span("⏱ Duration: ", style={"fontSize": "18px", "fontWeight": "bold", "marginRight": "10px", "color": "#e0e1e5"}),
-                        html.Span(id="workout_duration", style={"fontSize": "18px", "fontWeight": "bold", "color": "#e0e1e5"})
-                    ], style={"display": "flex", "alignItems": "center"})
-                ], style={"padding": "5px", "height": "40px"})
-            ])
-        ], width=3),
-    ], style={"marginBottom": "20px", "padding-top": "30px"}),
-
-    dbc.Row([
-        dbc.Col([
-            dbc.Card([
-                dbc.CardBody([
-                    html.H6("Yearly Average Time/Workout", style={"fontSize": "12px", "textAlign": "Center"}),
-                    html.H4("--", id="avg_duration", style={"textAlign": "Center"})
-                ], style={"padding": "5px"})
-            ]) 
-        ], width=6),
-        dbc.Col([
-            dbc.Card([
-                dbc.CardBody([
-                    html.H6("Yearly Average Distance Swam/Workout", style={"fontSize": "12px", "textAlign": "Center"}),
-                    html.H4("--", id="avg_distance", style={"textAlign": "Center"})
-                ], style={"padding": "5px"})
-            ])    
-        ], width=6)  
-    ], style={"marginBottom": "20px", "padding-top": "3px"}),
-    
-    dbc.Row([
-        dbc.Col([
-            dbc.Card([
-                dbc.CardBody([
-                    html.H6("📈 Yardage Overview", style={"marginBottom": "15px"}),
-                    dcc.Graph(
-                        id="yardage_overview_chart",
-                        config={'displayModeBar': False}
-                    )
-                ], style={"padding": "15px"})
-            ])
-        ], width=8),
-        dbc.Col([
-            dbc.Card([
-                dbc.CardBody([
-                    html.H6("📊 Breakdown by Stroke", style={"marginBottom": "15px"}),
-                    dcc.Graph(id="swim_strokes", config={'displayModeBar': False})
-                ], style={"padding": "15px"})
-            ])
-        ], width=4)
-    ], style={"marginBottom": "20px"}),
-    
-    dbc.Row([
-        dbc.Col([
-            dbc.Card([
-                dbc.CardBody([
-                    dbc.Row([
-                        dbc.Col([
-                            html.H6("🧮 Yearly Totals", style={"marginBottom": "15px"})
-                        ], width=11),
-
-                        dbc.Col([
+def build_overview_content(date_range):
+    data = refresh_data().data
+    start, end = parse_date_range(date_range)
+    daily = data.iloc[slice(*date_range_slice(data["date"].to_numpy(), start, end))]
+    return html.Div([
+        dbc.Row([
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardBody([
+                        html.Div([
+                            html.Span("📅 Date Range:", style={"fontSize": "16px", "fontWeight": "bold", "marginRight": "10px", "color": "#e0e1e5"}),
                             dcc.Dropdown(
-                                id="year_filter",
-                                options=[{"label": "All Years", "value": "all"}] + 
-                                        [{"label": str(year), "value": year} for year in sorted(data["year"].unique())],
+                                id="date_range_preset",
+                                options=date_range_options(data),
                                 value="all",
-                                placeholder="Select a year",
-                                style={"fontSize": "14px", "alignItems": "end", "marginRight": "15px", "border": "1px solid #375050", "borderRadius": "4px"}
+                                clearable=False,
+                                persistence=True,
+                                persistence_type="session",
+                                style={"width": "220px", "marginRight": "15px"}
+                            ),
+                            dcc.DatePickerRange(
+                                id="date_range_picker",
+                                min_date_allowed=data["date"].min(),
+                                max_date_allowed=pd.Timestamp.today().normalize(),
+                                disabled=True,
+                                persistence=True,
+                                persistence_type="session"
                             )
-                        ], width=1, style={"textAlign": "right"})
-                    ]),
-                    dbc.Row([
-                        dbc.Col([
-                            html.H6("Workouts", style={"fontSize": "12px", "textAlign": "Center"}),
-                            html.H4(str(len(data)), id="yearly_workouts", style={"textAlign": "Center"})
-                        ], width=4),
-                        dbc.Col([
-                            html.H6("Time Spent Swimming", style={"fontSize": "12px", "textAlign": "Center"}),
-                            html.H4(f"{sum(data['total_elapsed_time']/ 3600):,.2f} hours", id="yearly_time", style={"textAlign": "Center"})
-                        ], width=4),
-                        dbc.Col([
-                            html.H6("Distance", style={"fontSize": "12px", "textAlign": "Center"}),
-                            html.H4(f"{sum(data['total_distance']/1650):,.2f} miles", id="yearly_distance", style={"textAlign": "Center"})
-                        ], width=4)
-                    ])
+                        ], style={"display": "flex", "alignItems": "center"})
+                    ], style={"padding": "5px"})
+                ])
+            ])
+        ], style={"marginBottom": "20px", "padding-top": "30px"}),
+
+        dbc.Row([
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardBody([
+                        dcc.Dropdown(
+                            id="workout_filter",
+                            options=workout_options(daily),
+                            value=None,
+                            placeholder="Select a Workout"
+                        ),
+                    ], style={"border": "1px solid #375050", "borderRadius": "8px"})
+                ])
+            ], width=3),
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardBody([
+                        html.Div([
+                            html.Span("🔆 Date:", style={"fontSize": "18px", "fontWeight": "bold", "marginRight": "10px", "color": "#e0e1e5"}),
+                            html.Span(id="workout_date", style={"fontSize": "18px", "fontWeight": "bold", "color": "#e0e1e5"})
+                        ], style={"display": "flex", "alignItems": "center"})
+                    ], style={"padding": "5px", "height": "40px"})
+                ])
+            ], width=3),
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardBody([
+                        html.Div([
+                            html.Span("📈 Yardage: ", style={"fontSize": "18px", "fontWeight": "bold", "marginRight": "10px", "color": "#e0e1e5"}),
+                            html.Span(id="workout_yardage", style={"fontSize": "18px", "fontWeight": "bold", "color": "#e0e1e5"})
+                        ], style={"display": "flex", "alignItems": "center"})
+                    ], style={"padding": "5px", "height": "40px"})
+                ])
+            ], width=3),
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardBody([
+                        html.Div([
+                            html.Span("⏱ Duration: ", style={"fontSize": "18px", "fontWeight": "bold", "marginRight": "10px", "color": "#e0e1e5"}),
+                            html.Span(id="workout_duration", style={"fontSize": "18px", "fontWeight": "bold", "color": "#e0e1e5"})
+                        ], style={"display": "flex", "alignItems": "center"})
+                    ], style={"padding": "5px", "height": "40px"})
+                ])
+            ], width=3),
+        ], style={"marginBottom": "20px"}),
+
+        dbc.Row([
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardBody([
+                        html.H6("🔬 Workout Detail by Lap", style={"marginBottom": "15px"}),
+                        dcc.Graph(id="lap_drilldown_chart", config={'displayModeBar': False})
+                    ], style={"padding": "15px"})
+                ])
+            ], width=8),
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardBody([
+                        html.H6("🔁 Similar Workouts", style={"marginBottom": "15px"}),
+                        html.Div(id="similar_workouts")
+                    ], style={"padding": "15px"})
+                ], style={"height": "100%"})
+            ], width=4)
+        ], id="lap_drilldown_row", style={"marginBottom": "20px", "display": "none"}),
+
+        dbc.Row([
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardBody([
+                        html.H6("Yearly Average Time/Workout", style={"fontSize": "12px", "textAlign": "Center"}),
+                        html.H4("--", id="avg_duration", style={"textAlign": "Center"})
+                    ], style={"padding": "5px"})
+                ]) 
+            ], width=6),
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardBody([
+                        html.H6("Yearly Average Distance Swam/Workout", style={"fontSize": "12px", "textAlign": "Center"}),
+                        html.H4("--", id="avg_distance", style={"textAlign": "Center"})
+                    ], style={"padding": "5px"})
+                ])    
+            ], width=6)  
+        ], style={"marginBottom": "20px", "padding-top": "3px"}),
+    
+        dbc.Row([
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardBody([
+                        html.H6("📈 Yardage Overview", style={"marginBottom": "15px"}),
+                        dcc.Graph(
+                            id="yardage_overview_chart",
+                            config={'displayModeBar': False}
+                        ),
+                        # The daily version the chart on screen was last drawn from, so a refresh knows what to patch
+                        dcc.Store(id="overview_built_version")
+                    ], style={"padding": "15px"})
+                ])
+            ], width=8),
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardBody([
+                        html.H6("📊 Breakdown by Stroke", style={"marginBottom": "15px"}),
+                        dcc.Graph(id="swim_strokes", config={'displayModeBar': False})
+                    ], style={"padding": "15px"})
+                ])
+            ], width=4)
+        ], style={"marginBottom": "20px"}),
+    
+        dbc.Row([
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardBody([
+                        html.H6("📆 Year-over-Year Cumulative Yardage", style={"marginBottom": "15px"}),
+                        dcc.Graph(id="yoy_chart", config={'displayModeBar': False})
+                    ], style={"padding": "15px"})
+                ])
+            ])
+        ], style={"marginBottom": "20px"}),
+
+        dbc.Row([
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardBody([
+                        dbc.Row([
+                            dbc.Col([
+                                html.H6("🧮 Yearly Totals", style={"marginBottom": "15px"})
+                            ], width=11),
+
+                            dbc.Col([
+                                dcc.Dropdown(
+                                    id="year_filter",
+                                    options=[{"label": "All Years", "value": "all"}] + 
+                                            [{"label": str(year), "value": year} for year in sorted(data["year"].unique())],
+                                    value="all",
+                                    placeholder="Select a year",
+                                    style={"fontSize": "14px", "alignItems": "end", "marginRight": "15px", "border": "1px solid #375050", "borderRadius": "4px"}
+                                )
+                            ], width=1, style={"textAlign": "right"})
+                        ]),
+                        dbc.Row([
+                            dbc.Col([
+                                html.H6("Workouts", style={"fontSize": "12px", "textAlign": "Center"}),
+                                html.H4("--", id="yearly_workouts", style={"textAlign": "Center"})
+                            ], width=4),
+                            dbc.Col([
+                                html.H6("Time Spent Swimming", style={"fontSize": "12px", "textAlign": "Center"}),
+                                html.H4("--", id="yearly_time", style={"textAlign": "Center"})
+                            ], width=4),
+                            dbc.Col([
+                                html.H6("Distance", style={"fontSize": "12px", "textAlign": "Center"}),
+                                html.H4("--", id="yearly_distance", style={"textAlign": "Center"})
+                            ], width=4)
+                        ])
                     
-                ], style={"padding": "15px"})
+                    ], style={"padding": "15px"})
+                ])
             ])
-        ])
-    ]),
-], style={"height": "100vh"})
+        ]),
+    ], style={"height": "100vh"})
     
 
 
 
 # Table Content
-table_content = html.Div([
-    dbc.Row([
-        dbc.Col([
-            dbc.Card([
-                dbc.CardBody([
-                    html.H6("🏊‍♂️ Recent Workouts", style={"marginBottom": "15px"}),
-                    dash_table.DataTable(
-                        id="recent_workouts",
-                        columns=[
-                            {"name": "Date", "id": "date_display", "deletable": False, "selectable": True, "hideable": True},
-                            {"name": "Total Distance", "id": "total_distance", "deletable": False, "selectable": True, "hideable": True, "type": "numeric", "format": {"specifier": ",.0f"}},
-                            {"name": "Max Heart Rate", "id": "max_heart_rate", "deletable": False, "selectable": True, "hideable": True},
-                            {"name": "Number of Lengths", "id": "num_lengths", "deletable": False, "selectable": True, "hideable": True},
-                            {"name": "Stroke Type", "id": "swim_stroke", "deletable": False, "selectable": True, "hideable": True},
-                            {"name": "Distance (Miles)", "id": "total_distance_miles", "deletable": False, "selectable": True, "hideable": True, "type": "numeric", "format": {"specifier": ".2f"}},
-                            {"name": "Time (Minutes)", "id": "total_time_minutes", "deletable": False, "selectable": True, "hideable": True, "type": "numeric", "format": {"specifier": ".0f"}},
-                        ] + [
-                            {"name": i, "id": i, "deletable": True, "selectable": False}
-                            for i in data.columns
-                            if i not in ["date", "total_distance", "max_heart_rate", "num_lengths", "swim_stroke", "total_distance_miles", "total_time_minutes"]
-                        ],
-                        data=data.sort_values(by="date_display", ascending=False).to_dict("records"),
-                        hidden_columns=["message_index", "event", "event_type", "start_time", "total_elapsed_time", "total_cycles", "avg_heart_rate", "avg_cadence", "max_cadence", "lap_trigger", "first_length_index", "avg_stroke_distance", "sport", "min_heart_rate", "enhanced_avg_speed", "time", "Unnamed: 0", "workout_id", "backstroke", "butterfly", "breaststroke", 'freestyle', "im", "mixed", "year", "date_display"],
-                        sort_action="native",
-                        selected_columns=[],
-                        selected_rows=[],
-                        page_size=25,
-                        style_cell={"fontSize": "13px", "fontFamily": "Lexend Deca", "backgroundColor": "#e0e1e5"},
-                        style_header={"fontWeight": "bold"},
-                        style_cell_conditional=[
-                            {"if": {"column_id": "date_display"}, "width": "120px", "minWidth": "120px", "maxWidth": "120px"},
-                            {"if": {"column_id": "total_distance"}, "width": "130px", "minWidth": "130px", "maxWidth": "140px"},
-                            {"if": {"column_id": "max_heart_rate"}, "width": "130px", "minWidth": "130px", "maxWidth": "140px"},
-                            {"if": {"column_id": "num_lengths"}, "width": "130px", "minWidth": "130px", "maxWidth": "150px"},
-                            {"if": {"column_id": "swim_stroke"}, "width": "210px", "minWidth": "180px", "maxWidth": "210px"},
-                            {"if": {"column_id": "total_distance_miles"}, "width": "160px", "minWidth": "160px", "maxWidth": "160px"},
-                            {"if": {"column_id": "total_time_minutes"}, "width": "150px", "minWidth": "150px", "maxWidth": "150px"},
-                        ],
-                        css=[{"selector": ".show-hide", "rule": "display: none"}]
-                    )
+def build_table_content(units, stroke_filter=None):
+    dataset = refresh_data()
+    view = get_unit_view(units, dataset)
+    return html.Div([
+        dbc.Row([
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardBody([
+                        html.H6("🏊‍♂️ Recent Workouts", style={"marginBottom": "15px"}),
+                        dash_table.DataTable(
+                            id="recent_workouts",
+                            columns=[
+                                {"name": "Date", "id": "date_display", "deletable": False, "selectable": True, "hideable": True},
+                                {"name": f"Total Distance ({view['distance_label'].title()})", "id": "total_distance", "deletable": False, "selectable": True, "hideable": True, "type": "numeric", "format": {"specifier": ",.0f"}},
+                                {"name": "Max Heart Rate", "id": "max_heart_rate", "deletable": False, "selectable": True, "hideable": True},
+                                {"name": "Number of Lengths", "id": "num_lengths", "deletable": False, "selectable": True, "hideable": True},
+                                {"name": "Stroke Type", "id": "swim_stroke", "deletable": False, "selectable": True, "hideable": True},
+                                {"name": f"Distance ({view['long_label'].title()})", "id": "total_distance_miles", "deletable": False, "selectable": True, "hideable": True, "type": "numeric", "format": {"specifier": ".2f"}},
+                                {"name": "Time (Minutes)", "id": "total_time_minutes", "deletable": False, "selectable": True, "hideable": True, "type": "numeric", "format": {"specifier": ".0f"}},
+                            ] + [
+                                {"name": i, "id": i, "deletable": True, "selectable": False}
+                                for i in dataset.data.columns
+                                if i not in ["date", "total_distance", "max_heart_rate", "num_lengths", "swim_stroke", "total_distance_miles", "total_time_minutes", "stroke_mask"]
+                            ],
+                            data=filtered_table_records(view, stroke_filter),
+                            hidden_columns=["message_index", "event", "event_type", "start_time", "total_elapsed_time", "total_cycles", "avg_heart_rate", "avg_cadence", "max_cadence", "lap_trigger", "first_length_index", "avg_stroke_distance", "sport", "min_heart_rate", "enhanced_avg_speed", "time", "Unnamed: 0", "workout_id", "backstroke", "butterfly", "breaststroke", 'freestyle', "im", "mixed", "year", "date_display"],
+                            sort_action="native",
+                            selected_columns=[],
+                            selected_rows=[],
+                            page_size=25,
+                            style_cell={"fontSize": "13px", "fontFamily": "Lexend Deca", "backgroundColor": "#e0e1e5"},
+                            style_header={"fontWeight": "bold"},
+                            style_cell_conditional=[
+                                {"if": {"column_id": "date_display"}, "width": "120px", "minWidth": "120px", "maxWidth": "120px"},
+                                {"if": {"column_id": "total_distance"}, "width": "130px", "minWidth": "130px", "maxWidth": "140px"},
+                                {"if": {"column_id": "max_heart_rate"}, "width": "130px", "minWidth": "130px", "maxWidth": "140px"},
+                                {"if": {"column_id": "num_lengths"}, "width": "130px", "minWidth": "130px", "maxWidth": "150px"},
+                                {"if": {"column_id": "swim_stroke"}, "width": "210px", "minWidth": "180px", "maxWidth": "210px"},
+                                {"if": {"column_id": "total_distance_miles"}, "width": "160px", "minWidth": "160px", "maxWidth": "160px"},
+                                {"if": {"column_id": "total_time_minutes"}, "width": "150px", "minWidth": "150px", "maxWidth": "150px"},
+                            ],
+                            css=[{"selector": ".show-hide", "rule": "display: none"}]
+                        ),
+                        dcc.Store(id="table_built_version", data=dataset.versions["daily"])
+                    ])
                 ])
-            ])
-        ], style={"marginTop": "30px"})
-    ])
+            ], style={"marginTop": "30px"})
+        ])
     
-])
+    ])
 
 
 # Export Content
 export_content = html.Div([
     dbc.Row([
         dbc.Col([
-            html.H3("Export Data", style={"marginBottom": "20px"}),
+            html.H3("Import & Export Data", style={"marginBottom": "20px"}),
             dbc.Card([
                 dbc.CardBody([
+                    html.H5("Import Workouts", style={"marginBottom": "20px", "color": "#e0e1e5"}),
+                    html.P("Add workouts from a daily summary CSV, a lap export CSV from your watch, or an Excel export from this dashboard. Workouts and laps that are already here are skipped.", style={"color": "#e0e1e5"}),
+                    dbc.Input(
+                        id="import_token",
+                        type="password",
+                        placeholder="Write token",
+                        className="mb-2",
+                        style={"maxWidth": "300px"}
+                    ),
+                    dbc.Button(
+                        "Import File",
+                        color="primary",
+                        className="mb-2",
+                        id="import_btn"
+                    ),
+                    html.Div(id="import_status", style={"color": "#e0e1e5", "marginBottom": "20px"}),
                     html.H5("Download Options", style={"marginBottom": "20px", "color": "#e0e1e5"}),
                     html.P("Select the data you want to export:", style={"color": "#e0e1e5"}),
                     dbc.Button(
@@ -397,7 +2575,8 @@ export_content = html.Div([
                             )
                         ], width=2)
                     ]),
-                    html.Div(id="copy_link_feedback", style={"marginTop": "10px", "color": "#28a745", "display": "none"})
+                    html.Div(id="copy_link_feedback", style={"marginTop": "10px", "color": "#28a745", "display": "none"}),
+                    dcc.Store(id="share_url")
                 ], style={"padding": "10px"})
             ])
         ], style={"marginTop": "30px", "paddingLeft": "10px"})
@@ -406,109 +2585,112 @@ export_content = html.Div([
 
 
 # Settings Content
-settings_content = html.Div([
-    dbc.Row([
-        dbc.Col([
-            html.H3("Settings", style={"marginBottom": "30px"}),
-            
-            # Distance Units Setting
-            dbc.Card([
-                dbc.CardBody([
-                    html.H5("Distance Units", style={"marginBottom": "15px"}),
-                    html.P("Select your preferred measurement system:", style={"color": "#666", "fontSize": "14px"}),
-                    dcc.RadioItems(
-                        id="distance_units",
-                        options=[
-                            {"label": " Yards", "value": "yards"},
-                            {"label": " Meters", "value": "meters"}
-                        ],
-                        value="yards",
-                        inline=True,
-                        style={"fontSize": "16px"}
-                    )
-                ])
-            ], style={"marginBottom": "20px"}),
+def build_settings_content(settings):
+    settings = resolve_settings(settings)
+    theme = THEMES[settings["theme_selector"]]
+    return html.Div([
+        dbc.Row([
+            dbc.Col([
+                html.H3("Settings", style={"marginBottom": "30px"}),
             
-            # Auto Refresh Frequency Setting
-            dbc.Card([
-                dbc.CardBody([
-                    html.H5("Auto Refresh Frequency", style={"marginBottom": "15px"}),
-                    html.P("How often should the dashboard refresh data?", style={"color": "#666", "fontSize": "14px"}),
-                    dcc.Dropdown(
-                        id="refresh_frequency",
-                        options=[
-                            {"label": "Never", "value": "never"},
-                            {"label": "Every 30 seconds", "value": "30"},
-                            {"label": "Every minute", "value": "60"},
-                            {"label": "Every 5 minutes", "value": "300"},
-                            {"label": "Every 15 minutes", "value": "900"},
-                            {"label": "Every hour", "value": "3600"}
-                        ],
-                        value="never",
-                        placeholder="Select refresh frequency",
-                        style={"fontSize": "14px"}
-                    )
-                ])
-            ], style={"marginBottom": "20px"}),
+                # Distance Units Setting
+                dbc.Card([
+                    dbc.CardBody([
+                        html.H5("Distance Units", style={"marginBottom": "15px"}),
+                        html.P("Select your preferred measurement system:", style={"color": "#666", "fontSize": "14px"}),
+                        dcc.RadioItems(
+                            id="distance_units",
+                            options=[
+                                {"label": " Yards", "value": "yards"},
+                                {"label": " Meters", "value": "meters"}
+                            ],
+                            value=settings["distance_units"],
+                            inline=True,
+                            style={"fontSize": "16px"}
+                        )
+                    ])
+                ], style={"marginBottom": "20px"}),
             
-            # Theme Setting
-            dbc.Card([
-                dbc.CardBody([
-                    html.H5("Theme", style={"marginBottom": "15px"}),
-                    html.P("Choose a color theme for your dashboard:", style={"color": "#666", "fontSize": "14px"}),
-                    dcc.Dropdown(
-                        id="theme_selector",
-                        options=[
-                            {"label": "🌙 Dark Blue (Default)", "value": "dark_blue"},
-                            {"label": "🌊 Ocean Blue", "value": "ocean"},
-                            {"label": "🌲 Forest Green", "value": "forest"},
-                            {"label": "🌑 Midnight Black", "value": "midnight"},
-                            {"label": "🌅 Sunset Orange", "value": "sunset"},
-                            {"label": "💜 Purple Haze", "value": "purple"},
-                            {"label": "☀️ Light Mode", "value": "light"}
-                        ],
-                        value="dark_blue",
-                        placeholder="Select theme",
-                        style={"fontSize": "14px"}
-                    ),
-                    html.Div([
-                        html.P("Preview:", style={"marginTop": "15px", "marginBottom": "10px", "fontSize": "14px"}),
-                        html.Div(
-                            id="theme_preview",
-                            style={
-                                "height": "60px",
-                                "backgroundColor": "#282a54",
-                                "borderRadius": "8px",
-                                "display": "flex",
-                                "alignItems": "center",
-                                "justifyContent": "center",
-                                "color": "#e0e1e5",
-                                "fontWeight": "500"
-                            },
-                            children="Dark Blue Theme"
+                # Auto Refresh Frequency Setting
+                dbc.Card([
+                    dbc.CardBody([
+                        html.H5("Auto Refresh Frequency", style={"marginBottom": "15px"}),
+                        html.P("How often should the dashboard refresh data?", style={"color": "#666", "fontSize": "14px"}),
+                        dcc.Dropdown(
+                            id="refresh_frequency",
+                            options=[
+                                {"label": "Never", "value": "never"},
+                                {"label": "Every 30 seconds", "value": "30"},
+                                {"label": "Every minute", "value": "60"},
+                                {"label": "Every 5 minutes", "value": "300"},
+                                {"label": "Every 15 minutes", "value": "900"},
+                                {"label": "Every hour", "value": "3600"}
+                            ],
+                            value=settings["refresh_frequency"],
+                            placeholder="Select refresh frequency",
+                            style={"fontSize": "14px"}
                         )
                     ])
-                ])
-            ], style={"marginBottom": "20px"}),
+                ], style={"marginBottom": "20px"}),
             
-            # Save Button
-            dbc.Button(
-                "Save Settings",
-                id="save_settings_btn",
-                color="primary",
-                size="lg",
-                style={"marginTop": "20px"}
-            ),
+                # Theme Setting
+                dbc.Card([
+                    dbc.CardBody([
+                        html.H5("Theme", style={"marginBottom": "15px"}),
+                        html.P("Choose a color theme for your dashboard:", style={"color": "#666", "fontSize": "14px"}),
+                        dcc.Dropdown(
+                            id="theme_selector",
+                            options=[
+                                {"label": "🌙 Dark Blue (Default)", "value": "dark_blue"},
+                                {"label": "🌊 Ocean Blue", "value": "ocean"},
+                                {"label": "🌲 Forest Green", "value": "forest"},
+                                {"label": "🌑 Midnight Black", "value": "midnight"},
+                                {"label": "🌅 Sunset Orange", "value": "sunset"},
+                                {"label": "💜 Purple Haze", "value": "purple"},
+                                {"label": "☀️ Light Mode", "value": "light"}
+                            ],
+                            value=settings["theme_selector"],
+                            placeholder="Select theme",
+                            style={"fontSize": "14px"}
+                        ),
+                        html.Div([
+                            html.P("Preview:", style={"marginTop": "15px", "marginBottom": "10px", "fontSize": "14px"}),
+                            html.Div(
+                                id="theme_preview",
+                                style={
+                                    "height": "60px",
+                                    "backgroundColor": theme["background"],
+                                    "borderRadius": "8px",
+                                    "display": "flex",
+                                    "alignItems": "center",
+                                    "justifyContent": "center",
+                                    "color": theme["text"],
+                                    "fontWeight": "500"
+                                },
+                                children=theme["name"]
+                            )
+                        ])
+                    ])
+                ], style={"marginBottom": "20px"}),
             
-            html.Div(
-                id="settings_saved_message",
-                style={"marginTop": "15px", "color": "green", "display": "none"},
-                children="✓ Settings saved successfully!"
-            )
+                # Save Button
+                dbc.Button(
+                    "Save Settings",
+                    id="save_settings_btn",
+                    color="primary",
+                    size="lg",
+                    style={"marginTop": "20px"}
+                ),
             
-        ], width=8, style={"marginTop": "30px"})
+                html.Div(
+                    id="settings_saved_message",
+                    style={"marginTop": "15px", "color": "green", "display": "none"},
+                    children="✓ Settings saved successfully!"
+                )
+            
+            ], width=8, style={"marginTop": "30px"})
+        ])
     ])
-])
 
 
 # Account Content
@@ -682,20 +2864,32 @@ account_content = html.Div([
 content = html.Div(id="page-content", style={"marginLeft": "250px", "padding": "20px", "height": "100vh", "overflow": "hidden"})
 
 
-# App Layout
-app.layout = html.Div(
-    [
-        dcc.Location(id='url', refresh=False),
-        dcc.Store(id="print_trigger"),
-        dcc.Store(id="workout_selection_store", data=None),
-        dcc.Store(id="share_twitter_store"),
-        dcc.Store(id="share_facebook_store"),
-        dcc.Store(id="share_instagram_store"),
-        dcc.Store(id="share_email_store"),
-        sidebar,
-        content
-    ]
-)
+# App Layout (served per page load so the version stores start at the current dataset)
+def serve_layout():
+    versions = refresh_data().versions
+    return html.Div(
+        [
+            dcc.Location(id='url', refresh=False),
+            dcc.Store(id="user_settings", storage_type="local", data=DEFAULT_SETTINGS),
+            dcc.Store(id="daily_version", data=versions["daily"]),
+            dcc.Store(id="laps_version", data=versions["laps"]),
+            dcc.Interval(id="refresh_interval", interval=60 * 1000, disabled=True),
+            dcc.Store(id="print_trigger"),
+            dcc.Store(id="workout_selection_store", data=None),
+            dcc.Store(id="date_range", storage_type="session", data=resolve_date_range("all")),
+            dcc.Store(id="stroke_filter", storage_type="session", data=None),
+            dcc.Store(id="share_twitter_store"),
+            dcc.Store(id="share_facebook_store"),
+            dcc.Store(id="share_instagram_store"),
+            dcc.Store(id="share_email_store"),
+            dcc.Store(id="share_snapshot_store"),
+            sidebar,
+            content
+        ]
+    )
+
+
+app.layout = serve_layout
 
 
 # Callbacks for navigation
@@ -709,26 +2903,73 @@ app.layout = html.Div(
     Input("nav-export", "n_clicks"),
     Input("nav-settings", "n_clicks"),
     Input("nav-account", "n_clicks"),
+    State("user_settings", "data"),
+    State("date_range", "data"),
+    State("stroke_filter", "data"),
     prevent_initial_call=False
 )
-def render_page_content(overview_clicks, table_clicks, export_clicks, settings_clicks, account_clicks):
+def render_page_content(overview_clicks, table_clicks, export_clicks, settings_clicks, account_clicks, settings, date_range, stroke_filter):
     ctx = dash.callback_context
     
     if not ctx.triggered:
-        return overview_content, True, False, False
+        return build_overview_content(date_range), True, False, False
     
     button_id = ctx.triggered[0]["prop_id"].split(".")[0]
     
     if button_id == "nav-table":
-        return table_content, False, True, False
+        return build_table_content(resolve_settings(settings)["distance_units"], stroke_filter), False, True, False
     elif button_id == "nav-export":
         return export_content, False, False, True
     elif button_id == "nav-settings":
-        return settings_content, False, False, False
+        return build_settings_content(settings), False, False, False
     elif button_id == "nav-account":
         return account_content, False, False, False
     else:
-        return overview_content, True, False, False
+        return build_overview_content(date_range), True, False, False
+
+
+# Callback to persist the Settings page to the user's browser
+@callback(
+    Output("user_settings", "data"),
+    Output("settings_saved_message", "style"),
+    Input("save_settings_btn", "n_clicks"),
+    State("distance_units", "value"),
+    State("refresh_frequency", "value"),
+    State("theme_selector", "value"),
+    prevent_initial_call=True
+)
+def save_settings(n_clicks, distance_units, refresh_frequency, theme_selector):
+    if not n_clicks:
+        return dash.no_update, dash.no_update
+
+    settings = resolve_settings({
+        "distance_units": distance_units,
+        "refresh_frequency": refresh_frequency,
+        "theme_selector": theme_selector
+    })
+    return settings, {"marginTop": "15px", "color": "green", "display": "block"}
+
+
+@callback(
+    Output("theme_preview", "style"),
+    Output("theme_preview", "children"),
+    Input("theme_selector", "value"),
+    State("theme_preview", "style"),
+    prevent_initial_call=True
+)
+def update_theme_preview(theme_name, style):
+    theme = THEMES.get(theme_name, THEMES[DEFAULT_SETTINGS["theme_selector"]])
+    return {**style, "backgroundColor": theme["background"], "color": theme["text"]}, theme["name"]
+
+
+@callback(
+    Output("sidebar", "style"),
+    Input("user_settings", "data"),
+    State("sidebar", "style")
+)
+def apply_theme(settings, style):
+    theme = THEMES[resolve_settings(settings)["theme_selector"]]
+    return {**style, "backgroundColor": theme["background"]}
 
 
 # Callback to save workout selection to store
@@ -749,181 +2990,494 @@ def save_workout_selection(selected_workout):
     prevent_initial_call=True
 )
 def restore_workout_selection(overview_active, stored_workout):
-    # When Overview page becomes active, restore the stored workout selection
-    if overview_active and stored_workout is not None:
+    # When Overview page becomes active, restore the stored workout selection.
+    # Older sessions stored the workout's date instead of its id, so those are dropped.
+    if overview_active and isinstance(stored_workout, int):
         return stored_workout
     return dash.no_update
 
 
-# Original callbacks for data
-
+# The sidebar's stroke choice is kept as one bitmask that every data callback filters with
 @callback(
-    Output("yardage_overview_chart", "figure"),
-    Input("url", "pathname")
+    Output("stroke_filter", "data"),
+    Input("stroke_filter_strokes", "value"),
+    Input("stroke_filter_mode", "value")
 )
-def create_yardage_chart(pathname):
-    fig = px.line(
-        x="date",
-        y="total_distance",
-        data_frame=data,
-        labels={
-            "date": "Workout Date",
-            "total_distance": "Total Distance (yards)"
+def update_stroke_filter(strokes, mode):
+    return encode_stroke_filter(strokes, mode)
+
+
+# Auto refresh: poll the version endpoint and only touch the version stores that changed,
+# so each component reruns only when the table it reads from has new data
+clientside_callback(
+    """
+    function(settings) {
+        const frequency = settings ? settings.refresh_frequency : "never";
+        if (!frequency || frequency === "never") {
+            return [60000, true];
         }
-    )
-    
-    # Make background transparent
-    fig.update_layout(
-        paper_bgcolor='rgba(0,0,0,0)',
-        plot_bgcolor='rgba(0,0,0,0)',
-        font=dict(color='#e0e1e5'),
-        xaxis=dict(
-            showgrid=True,
-            gridcolor='rgba(128,128,128,0.2)'
-        ),
-        yaxis=dict(
-            showgrid=True,
-            gridcolor='rgba(128,128,128,0.2)'
-        )
-    )
-    
-    return fig
+        return [parseInt(frequency, 10) * 1000, false];
+    }
+    """,
+    Output("refresh_interval", "interval"),
+    Output("refresh_interval", "disabled"),
+    Input("user_settings", "data")
+)
+
+clientside_callback(
+    """
+    async function(n_intervals, dailyVersion, lapsVersion) {
+        const noUpdate = window.dash_clientside.no_update;
+        try {
+            const response = await fetch("/api/version", {cache: "no-store"});
+            if (!response.ok) {
+                return [noUpdate, noUpdate];
+            }
+            const versions = await response.json();
+            return [
+                versions.daily !== dailyVersion ? versions.daily : noUpdate,
+                versions.laps !== lapsVersion ? versions.laps : noUpdate
+            ];
+        } catch (err) {
+            console.error("Version check failed: ", err);
+            return [noUpdate, noUpdate];
+        }
+    }
+    """,
+    Output("daily_version", "data"),
+    Output("laps_version", "data"),
+    Input("refresh_interval", "n_intervals"),
+    State("daily_version", "data"),
+    State("laps_version", "data"),
+    prevent_initial_call=True
+)
 
+
+# Rows are patched onto the table the page was rendered with, which may already be newer than
+# the version the poll last saw, so the patch starts from the version the table was built at
 @callback(
-    Output('recent_workouts', "style_data_conditional"),
-    Input("recent_workouts", 'selected_columns'),
+    Output("recent_workouts", "data"),
+    Output("table_built_version", "data"),
+    Input("daily_version", "data"),
+    Input("stroke_filter", "data"),
+    State("table_built_version", "data"),
+    State("user_settings", "data"),
+    prevent_initial_call=True
+)
+def refresh_recent_workouts(daily_version, stroke_filter, built_version, settings):
+    dataset = refresh_data()
+    version = dataset.versions["daily"]
+    patching = dash.ctx.triggered_id == "daily_version"
+    if patching and built_version == version:
+        return dash.no_update, dash.no_update
+    view = get_unit_view(resolve_settings(settings)["distance_units"], dataset)
+    offset = appended_daily_offset(dataset, built_version) if patching else None
+    if offset is None:
+        return filtered_table_records(view, stroke_filter), version
+
+    # Newest rows sit at the top of the table, so prepend the appended workouts oldest first
+    new_rows = view["daily"].iloc[offset:]
+    patched = Patch()
+    for record in build_table_records(new_rows[stroke_filter_match(new_rows["stroke_mask"], stroke_filter)]):
+        patched.prepend(record)
+    return patched, version
+
+
+# Uploads go straight to the import route as the raw request body, so the browser streams the
+# file from disk instead of base64-encoding it into a callback
+clientside_callback(
+    """
+    async function(n_clicks, token) {
+        if (!n_clicks) {
+            return window.dash_clientside.no_update;
+        }
+        const input = document.createElement("input");
+        input.type = "file";
+        input.accept = ".csv,.xlsx";
+        const file = await new Promise(resolve => {
+            input.addEventListener("change", () => resolve(input.files[0] || null));
+            input.addEventListener("cancel", () => resolve(null));
+            input.click();
+        });
+        if (!file) {
+            return window.dash_clientside.no_update;
+        }
+        try {
+            const response = await fetch("/api/import?filename=" + encodeURIComponent(file.name), {
+                method: "POST",
+                headers: {"Content-Type": "application/octet-stream", "X-Swim-Write-Token": token || ""},
+                body: file
+            });
+            const result = await response.json();
+            if (!response.ok) {
+                return "Import failed: " + result.error;
+            }
+            return `Imported ${result.workouts_added} workouts and ${result.laps_added} laps ` +
+                `(${result.duplicates} duplicates skipped, ${result.rejected} invalid rows)`;
+        } catch (err) {
+            console.error("Import failed: ", err);
+            return "Import failed: " + err;
+        }
+    }
+    """,
+    Output("import_status", "children"),
+    Input("import_btn", "n_clicks"),
+    State("import_token", "value"),
     prevent_initial_call=True
 )
-def update_table_style(selected_columns):
-    return [{
-        "if": {"column_id": i},
-        'background_color':'transparent',
-        "font-family": "sans-serif"
-    } for i in selected_columns]
 
 
+# Callbacks for the overview date range
 @callback(
-    Output('workout_date', "children"),
-    Output('workout_yardage', "children"),
-    Output('workout_duration', "children"),
-    Input('workout_filter', 'value'),
+    Output("date_range", "data"),
+    Output("date_range_picker", "disabled"),
+    Input("date_range_preset", "value"),
+    Input("date_range_picker", "start_date"),
+    Input("date_range_picker", "end_date"),
     prevent_initial_call=True
 )
-def update_workout_filter(selected_date):
-    if selected_date is None:
-        return "Select a workout", "Select a workout", "Select a workout"
+def update_date_range(preset, start_date, end_date):
+    return resolve_date_range(preset, start_date, end_date), preset != "custom"
 
-    filtered_df = data[data["date_display"] == selected_date]
-    total_yardage = filtered_df["total_distance"].sum()
-    total_duration = filtered_df["total_time_minutes"].sum()
 
-    return selected_date, f"{(total_yardage):,.0f} yards", f"{(total_duration):,.0f} minutes"
+# Original callbacks for data
 
+# Overview
+# Every overview output is built from one slice of the unit view by a single callback, so the
+# first paint is one request. A later change only rebuilds the outputs that read the input that
+# changed; the rest come back as no_update.
+OVERVIEW_DEPENDENCIES = {
+    "yardage": {"url", "user_settings", "daily_version", "date_range", "stroke_filter"},
+    "strokes": {"workout_filter", "user_settings", "daily_version", "laps_version", "date_range", "stroke_filter"},
+    "options": {"daily_version", "date_range", "stroke_filter"},
+    "workout": {"workout_filter", "user_settings", "daily_version"},
+    "totals": {"year_filter", "user_settings", "daily_version", "date_range", "stroke_filter"}
+}
+NO_WORKOUT = ("Select a workout", "Select a workout", "Select a workout")
 
-@callback(
-    Output("swim_strokes", "figure"),
-    Input("workout_filter", "value")
-)
-def update_swim_pie(selected_date):
-    if selected_date is None:
-        filtered_df = agg_data.copy()
+
+def year_options(view):
+    return [{"label": "All Years", "value": "all"}] + [{"label": str(year), "value": year} for year in sorted(view["daily"]["year"].unique())]
+
+
+def workout_summary(view, selected_workout):
+    workout = find_workout(view, selected_workout) if selected_workout is not None else None
+    if workout is None:
+        return NO_WORKOUT
+    return workout["date_display"], f"{workout['distance']:,.0f} {view['distance_label']}", f"{workout['minutes']:,.0f} minutes"
+
+
+# The pie's styling never changes, so Plotly Express builds and validates it once and each
+# request only fills in the strokes
+_stroke_pie_shell = None
+
+
+def stroke_pie_figure(names, values, title):
+    global _stroke_pie_shell
+    if _stroke_pie_shell is None:
+        fig = plotly_express().pie(names=["Placeholder"], values=[1])
+        fig.update_traces(
+            hoverinfo="skip",
+            hovertemplate=None
+        )
+        fig.update_layout(
+            paper_bgcolor='rgba(0,0,0,0)',
+            plot_bgcolor='rgba(0,0,0,0)',
+            font=dict(color='#e0e1e5'),
+            legend=dict(
+                orientation="h",
+                yanchor="bottom",
+                y=-0.3,
+                xanchor="center",
+                x=0.5
+            ),
+            margin=dict(b=80) 
+        )
+        _stroke_pie_shell = fig.to_dict()
+
+    trace = {**_stroke_pie_shell["data"][0], "labels": names, "values": values}
+    layout = dict(_stroke_pie_shell["layout"])
+    if title:
+        # Plotly Express only reserves its default top margin when there is no title
+        layout["title"] = {"text": title}
+        layout["margin"] = {side: size for side, size in layout["margin"].items() if side != "t"}
+    return {"data": [trace], "layout": layout}
+
+
+def build_stroke_pie(view, laps, selected_workout):
+    workout = find_workout(view, selected_workout) if selected_workout is not None else None
+    if workout is None:
+        filtered_df = laps
         title = ""
     else:
-        try:
-            date_obj = pd.to_datetime(selected_date)
-            formatted_date = date_obj.strftime("%m/%d/%Y")
-        except:
-            formatted_date = selected_date
-        
-        filtered_df = agg_data[agg_data["date"] == formatted_date]
-        title = f"Workout - {selected_date}"
-        
-    filtered_df = filtered_df[(filtered_df["swim_stroke"].notna()) & (filtered_df["total_distance"] > 0)]
+        # The workout's laps sit in its day's slice of the summary
+        _, day_laps = slice_unit_view(view, workout["date"], workout["date"])
+        filtered_df = day_laps[(day_laps["workout_id"] == selected_workout).fillna(False).to_numpy()]
+        title = f"Workout - {workout['date_display']}"
     
     if filtered_df.empty:
-        fig = px.pie(names=["No Data"], values=[1], title=title)
+        fig = plotly_express().pie(names=["No Data"], values=[1], title=title)
         fig.update_traces(textinfo='none')
         return fig
     
-    stroke_summary = filtered_df.groupby("swim_stroke")["total_distance"].sum().reset_index()
+    stroke_summary = filtered_df.groupby("swim_stroke")["distance"].sum()
+    return stroke_pie_figure(stroke_summary.index.str.title().tolist(), stroke_summary.tolist(), title)
 
-    stroke_summary["swim_stroke"] = stroke_summary["swim_stroke"].str.title()
 
-    fig = px.pie(stroke_summary, names="swim_stroke", values="total_distance", title=title)
+def yearly_totals(view, daily, selected_year):
+    if selected_year != "all" and selected_year is not None:
+        # The selected year is a contiguous run of the already sliced days
+        lo, hi = date_range_slice(daily["date"].to_numpy(), pd.Timestamp(int(selected_year), 1, 1), pd.Timestamp(int(selected_year), 12, 31))
+        daily = daily.iloc[lo:hi]
     
-    fig.update_traces(
-        hoverinfo="skip",
-        hovertemplate=None
-    )
+    num_workouts = len(daily)
+    total_time = daily["hours"].sum()
+    total_distance = daily["distance_long"].sum()
 
+    if num_workouts == 0:
+        return "0", "0.00 hours", f"0.00 {view['long_label']}", "--", "--"
 
-    fig.update_layout(
-        paper_bgcolor='rgba(0,0,0,0)',
-        plot_bgcolor='rgba(0,0,0,0)',
-        font=dict(color='#e0e1e5'),
-        legend=dict(
-            orientation="h",
-            yanchor="bottom",
-            y=-0.3,
-            xanchor="center",
-            x=0.5
-        ),
-        margin=dict(b=80) 
+    avg_duration_min = daily["minutes"].mean()
+    avg_distance = daily["distance"].mean()
+
+    return (
+        str(num_workouts),
+        f"{total_time:,.2f} hours",
+        f"{total_distance:,.2f} {view['long_label']}",
+        f"{avg_duration_min:,.0f} min",
+        f"{avg_distance:,.0f} {view['distance_label']}"
     )
 
-    return fig
+
+def overview_yardage_figure(view, daily, start, end, stroke_filter=None):
+    if start is None and end is None and not stroke_filter:
+        return view["yardage_figure"]
+    return build_yardage_figure(daily, UNIT_SYSTEMS[view["units"]])
+
+
+def filter_strokes(daily, laps, stroke_filter):
+    if not stroke_filter:
+        return daily, laps
+    return daily[stroke_filter_match(daily["stroke_mask"], stroke_filter)], laps[stroke_filter_match(laps["workout_mask"], stroke_filter)]
+
+
+def filtered_table_records(view, stroke_filter):
+    if not stroke_filter:
+        return view["table_records"]
+    records = view["table_records"]
+    return [records[position] for position in np.flatnonzero(stroke_filter_match(view["table_stroke_masks"], stroke_filter))]
 
 
 @callback(
+    Output("yardage_overview_chart", "figure"),
+    Output("swim_strokes", "figure"),
+    Output("workout_filter", "options"),
+    Output("year_filter", "options"),
+    Output("workout_date", "children"),
+    Output("workout_yardage", "children"),
+    Output("workout_duration", "children"),
     Output("yearly_workouts", "children"),
     Output("yearly_time", "children"),
     Output("yearly_distance", "children"),
     Output("avg_duration", "children"),
     Output("avg_distance", "children"),
+    Output("overview_built_version", "data"),
+    Input("url", "pathname"),
+    Input("user_settings", "data"),
+    Input("daily_version", "data"),
+    Input("laps_version", "data"),
+    Input("date_range", "data"),
+    Input("workout_filter", "value"),
     Input("year_filter", "value"),
-    prevent_initial_call=False
+    Input("stroke_filter", "data"),
+    State("overview_built_version", "data")
 )
-def update_yearly_totals(selected_year):
-    if selected_year == "all" or selected_year is None:
-        filtered_df = data.copy()
-    else:
-        filtered_df = data[data["year"] == int(selected_year)]
-    
-    num_workouts = len(filtered_df)
-    total_time = filtered_df["total_elapsed_time"].sum() / 3600
-    total_distance = filtered_df["total_distance"].sum() / 1650
-
-    avg_duration_min = filtered_df["total_elapsed_time"].mean() / 60
-    avg_distance_yards = filtered_df["total_distance"].mean()
-
+def update_overview(pathname, settings, daily_version, laps_version, date_range, selected_workout, selected_year, stroke_filter, built_version):
+    triggered = set(dash.ctx.triggered_prop_ids.values())
+    stale = {part for part, inputs in OVERVIEW_DEPENDENCIES.items() if not triggered or inputs & triggered}
+    if not triggered and not stroke_filter:
+        # The overview layout already carries the options for its date range
+        stale.discard("options")
+
+    dataset = refresh_data()
+    view = get_unit_view(resolve_settings(settings)["distance_units"], dataset)
+    start, end = parse_date_range(date_range)
+    range_daily, range_laps = slice_unit_view(view, start, end)
+    daily, laps = filter_strokes(range_daily, range_laps, stroke_filter)
+
+    yardage = built = dash.no_update
+    version = dataset.versions["daily"]
+    patching = "daily_version" in triggered and not triggered & {"url", "user_settings", "date_range", "stroke_filter"}
+    if "yardage" in stale and not (patching and built_version == version):
+        offset = appended_daily_offset(dataset, built_version) if patching else None
+        built = version
+        if offset is None:
+            yardage = overview_yardage_figure(view, daily, start, end, stroke_filter)
+        else:
+            # The chart already shows everything up to the version it was built at, so only send the new points
+            lo, _ = date_range_slice(view["daily_dates"], start, end)
+            new_rows = range_daily.iloc[max(offset - lo, 0):]
+            new_rows = new_rows[stroke_filter_match(new_rows["stroke_mask"], stroke_filter)]
+            if not new_rows.empty:
+                x, y = yardage_points(new_rows)
+                yardage = Patch()
+                yardage["data"][0]["x"].extend(x)
+                yardage["data"][0]["y"].extend(y)
+
+    no_update = dash.no_update
     return (
-        str(num_workouts),
-        f"{total_time:,.2f} hours",
-        f"{total_distance:,.2f} miles",
-        f"{avg_duration_min:,.0f} min",
-        f"{avg_distance_yards:,.0f} yards"
+        yardage,
+        build_stroke_pie(view, laps, selected_workout) if "strokes" in stale else no_update,
+        *((workout_options(daily), year_options(view)) if "options" in stale else (no_update, no_update)),
+        *(workout_summary(view, selected_workout) if "workout" in stale else (no_update,) * 3),
+        *(yearly_totals(view, daily, selected_year) if "totals" in stale else (no_update,) * 5),
+        built
     )
 
 
+# Compares whole seasons, so it ignores the overview date range
+@callback(
+    Output("yoy_chart", "figure"),
+    Input("user_settings", "data"),
+    Input("daily_version", "data"),
+    Input("stroke_filter", "data")
+)
+def create_yoy_chart(settings, daily_version, stroke_filter):
+    dataset = refresh_data()
+    view = get_unit_view(resolve_settings(settings)["distance_units"], dataset)
+    if not stroke_filter:
+        return view["yoy_figure"]
+    data = dataset.data[stroke_filter_match(dataset.data["stroke_mask"], stroke_filter)]
+    return build_yoy_figure(build_yoy_pivot(data), UNIT_SYSTEMS[view["units"]]).to_dict()
+
+
+@callback(
+    Output('recent_workouts', "style_data_conditional"),
+    Input("recent_workouts", 'selected_columns'),
+    prevent_initial_call=True
+)
+def update_table_style(selected_columns):
+    return [{
+        "if": {"column_id": i},
+        'background_color':'transparent',
+        "font-family": "sans-serif"
+    } for i in selected_columns]
+
+
+@callback(
+    Output("lap_drilldown_chart", "figure"),
+    Output("lap_drilldown_row", "style"),
+    Input("workout_filter", "value"),
+    Input("user_settings", "data"),
+    Input("laps_version", "data"),
+    State("lap_drilldown_row", "style")
+)
+def update_lap_drilldown(selected_workout, settings, laps_version, style):
+    if selected_workout is None:
+        return dash.no_update, {**style, "display": "none"}
+
+    dataset = refresh_data()
+    units = resolve_settings(settings)["distance_units"]
+    workout = find_workout(get_unit_view(units, dataset), selected_workout)
+    if workout is None:
+        return dash.no_update, {**style, "display": "none"}
+
+    laps = workout_laps(dataset, selected_workout)
+    return build_drilldown_figure(laps, UNIT_SYSTEMS[units], f"Workout - {workout['date_display']}"), {**style, "display": "block"}
+
+
+@callback(
+    Output("similar_workouts", "children"),
+    Input("workout_filter", "value"),
+    Input("user_settings", "data"),
+    Input("daily_version", "data"),
+    Input("laps_version", "data"),
+    prevent_initial_call=True
+)
+def update_similar_workouts(selected_workout, settings, daily_version, laps_version):
+    if selected_workout is None:
+        return dash.no_update
+
+    dataset = refresh_data()
+    view = get_unit_view(resolve_settings(settings)["distance_units"], dataset)
+    positions = np.flatnonzero(view["daily"]["workout_id"].to_numpy() == selected_workout)
+    if len(positions) == 0:
+        return html.P("Workout not found", style={"color": "#e0e1e5"})
+
+    nearest, distances = similar_workouts(dataset, positions[0])
+    if len(nearest) == 0:
+        return html.P("No earlier workouts to compare yet", style={"color": "#e0e1e5"})
+
+    daily = view["daily"].iloc[nearest]
+    return dbc.ListGroup([
+        dbc.ListGroupItem([
+            html.Div(row.date_display, style={"fontWeight": "bold"}),
+            html.Small(f"{row.distance:,.0f} {view['distance_label']} · {row.minutes:,.0f} min · {100 / (1 + distance):.0f}% match")
+        ])
+        for row, distance in zip(daily.itertuples(), distances)
+    ], flush=True)
+
+
+# Excel sheets hold at most this many rows, so longer lap histories continue on a new sheet
+EXCEL_MAX_ROWS = 1048576
+
+
+def append_sheet_rows(workbook, title, frames):
+    sheet = None
+    part = 0
+    rows = 0
+    for frame in frames:
+        for row in frame.astype(object).where(frame.notna(), None).itertuples(index=False, name=None):
+            if sheet is None or rows >= EXCEL_MAX_ROWS:
+                part += 1
+                sheet = workbook.create_sheet(title if part == 1 else f"{title} ({part})")
+                sheet.append(list(frame.columns))
+                rows = 1
+            sheet.append(row)
+            rows += 1
+
+
+def write_streamed_workbook(output, daily, lap_chunks):
+    import openpyxl
+
+    # Write-only workbooks flush rows as they go instead of keeping every cell in memory
+    workbook = openpyxl.Workbook(write_only=True)
+    append_sheet_rows(workbook, "Daily Swim Summary", [daily])
+    append_sheet_rows(workbook, "Aggregated Swim Data", (lap_export_frame(chunk) for chunk in lap_chunks))
+    workbook.save(output)
+
+
+# The export follows the stroke filter; laps are kept with the workouts they belong to
+def export_laps(laps, daily, stroke_filter):
+    return laps[laps["workout_id"].isin(daily["workout_id"])] if stroke_filter else laps
+
+
 @callback(
     Output("download_excel", "data"),
     Input("export_excel_btn", "n_clicks"),
+    State("stroke_filter", "data"),
     prevent_initial_call=True
 )
-def export_to_excel(n_clicks):
+def export_to_excel(n_clicks, stroke_filter):
     if n_clicks is None:
         return dash.no_update
     
     
     output = io.BytesIO()
+    dataset = refresh_data()
+    daily = dataset.data[stroke_filter_match(dataset.data["stroke_mask"], stroke_filter)]
     
-    # Create Excel writer object
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-     
-        data.to_excel(writer, sheet_name='Daily Swim Summary', index=False)
-        
-       
-        agg_data.to_excel(writer, sheet_name='Aggregated Swim Data', index=False)
+    if dataset.agg_data is None:
+        # Memory-bounded mode: stream the laps into the workbook chunk by chunk
+        write_streamed_workbook(output, daily, (export_laps(chunk, daily, stroke_filter) for chunk in iter_lap_chunks(dataset)))
+    else:
+        # Create Excel writer object
+        with pd.ExcelWriter(output, engine='openpyxl') as writer:
+         
+            daily.to_excel(writer, sheet_name='Daily Swim Summary', index=False)
+            
+           
+            lap_export_frame(export_laps(dataset.agg_data, daily, stroke_filter)).to_excel(writer, sheet_name='Aggregated Swim Data', index=False)
     
     
     output.seek(0)
@@ -964,14 +3518,48 @@ clientside_callback(
 
 
 # Social sharing callbacks
+# The share buttons link to a static snapshot of the current view. Working out the link is only
+# encoding, so it is kept current; the page itself is rendered once a share button is clicked.
+@callback(
+    Output("share_url", "data"),
+    Input("user_settings", "data"),
+    Input("date_range", "data"),
+    Input("workout_selection_store", "data"),
+    Input("stroke_filter", "data"),
+    Input("daily_version", "data")
+)
+def prepare_share_snapshot(settings, date_range, workout, stroke_filter, daily_version):
+    token = snapshot_token(settings, date_range, workout, stroke_filter)
+    # Without a token the share buttons link to the live dashboard
+    return url_for("serve_snapshot", token=token) if token else None
+
+
+@callback(
+    Output("share_snapshot_store", "data"),
+    Input("share_twitter_btn", "n_clicks"),
+    Input("share_facebook_btn", "n_clicks"),
+    Input("share_instagram_btn", "n_clicks"),
+    Input("share_email_btn", "n_clicks"),
+    Input("copy_link_btn", "n_clicks"),
+    State("share_url", "data"),
+    prevent_initial_call=True
+)
+def render_share_snapshot(twitter_clicks, facebook_clicks, instagram_clicks, email_clicks, copy_clicks, share_url):
+    token = (share_url or "").rsplit("/", 1)[-1]
+    snapshot = read_snapshot_token(token)
+    if snapshot is None:
+        return dash.no_update
+    return create_snapshot(token, snapshot)
+
+
 clientside_callback(
     """
-    function(n_clicks) {
+    function(n_clicks, shareUrl) {
         if (!n_clicks) {
             return null;
         }
         
-        const url = encodeURIComponent(window.location.href);
+        const url = encodeURIComponent(shareUrl ? new URL(shareUrl, window.location.origin).href : window.location.href);
         const text = encodeURIComponent("Check out my swim tracking dashboard!");
         const twitterUrl = "https://twitter.com/intent/tweet?url=" + url + "&text=" + text;
         window.open(twitterUrl, "_blank", "width=550,height=420");
@@ -981,17 +3569,18 @@ clientside_callback(
     """,
     Output("share_twitter_store", "data"),
     Input("share_twitter_btn", "n_clicks"),
+    State("share_url", "data"),
     prevent_initial_call=True
 )
 
 clientside_callback(
     """
-    function(n_clicks) {
+    function(n_clicks, shareUrl) {
         if (!n_clicks) {
             return null;
         }
         
-        const url = encodeURIComponent(window.location.href);
+        const url = encodeURIComponent(shareUrl ? new URL(shareUrl, window.location.origin).href : window.location.href);
         const facebookUrl = "https://www.facebook.com/sharer/sharer.php?u=" + url;
         window.open(facebookUrl, "_blank", "width=550,height=420");
         
@@ -1000,18 +3589,19 @@ clientside_callback(
     """,
     Output("share_facebook_store", "data"),
     Input("share_facebook_btn", "n_clicks"),
+    State("share_url", "data"),
     prevent_initial_call=True
 )
 
 clientside_callback(
     """
-    function(n_clicks) {
+    function(n_clicks, shareUrl) {
         if (!n_clicks) {
             return null;
         }
         
 
-        const url = window.location.href;
+        const url = shareUrl ? new URL(shareUrl, window.location.origin).href : window.location.href;
         
         if (navigator.clipboard && navigator.clipboard.writeText) {
             navigator.clipboard.writeText(url).then(function() {
@@ -1042,17 +3632,18 @@ clientside_callback(
     """,
     Output("share_instagram_store", "data"),
     Input("share_instagram_btn", "n_clicks"),
+    State("share_url", "data"),
     prevent_initial_call=True
 )
 
 clientside_callback(
     """
-    function(n_clicks) {
+    function(n_clicks, shareUrl) {
         if (!n_clicks) {
             return null;
         }
         
-        const url = window.location.href;
+        const url = shareUrl ? new URL(shareUrl, window.location.origin).href : window.location.href;
         const subject = encodeURIComponent("My Swim Tracking Dashboard");
         const body = encodeURIComponent("Check out my swim tracking dashboard: " + url);
         const mailtoUrl = "mailto:?subject=" + subject + "&body=" + body;
@@ -1063,17 +3654,18 @@ clientside_callback(
     """,
     Output("share_email_store", "data"),
     Input("share_email_btn", "n_clicks"),
+    State("share_url", "data"),
     prevent_initial_call=True
 )
 
 clientside_callback(
     """
-    function(n_clicks) {
+    function(n_clicks, shareUrl) {
         if (!n_clicks) {
             return {"display": "none"};
         }
         
-        const url = window.location.href;
+        const url = shareUrl ? new URL(shareUrl, window.location.origin).href : window.location.href;
         
 
         if (navigator.clipboard && navigator.clipboard.writeText) {
@@ -1120,10 +3712,15 @@ clientside_callback(
     """,
     Output("copy_link_feedback", "style"),
     Input("copy_link_btn", "n_clicks"),
+    State("share_url", "data"),
     prevent_initial_call=True
 )
 
 
+startup_stage("build layout and callbacks")
+report_startup()
+
+
 # Run the App
 if __name__ == "__main__":
     app.run(debug=True)
\ No newline at end of file
@@ -0,0 +1,172 @@
+// Browser Cache
+// Keeps the server's answers for the overview in IndexedDB, keyed by the dataset version of each
+// table they read. A reload or return visit makes a single /api/version check and then renders
+// from the cache; only outputs whose table changed since the last visit go back to the server.
+(function () {
+    const DATABASE_NAME = "swim-dashboard-cache";
+    const STORE_NAME = "responses";
+
+    // Callback (first output) or layout request -> tables its response is derived from.
+    // "day" covers content that depends on today's date, such as the date picker's upper bound.
+    const CACHED_OUTPUTS = {
+        "page-content.children": ["daily", "day"],
+        "yardage_overview_chart.figure": ["daily", "laps"],
+        "yoy_chart.figure": ["daily"],
+        "recent_workouts.data": ["daily"],
+        "lap_drilldown_chart.figure": ["daily", "laps"],
+        "similar_workouts.children": ["daily", "laps"]
+    };
+    const CACHED_REQUESTS = {
+        "_dash-layout": ["daily", "laps", "day"],
+        "_dash-dependencies": []
+    };
+    // Live refreshes patch what is already on screen, so they always go to the server
+    const LIVE_INPUTS = ["daily_version.data", "laps_version.data"];
+
+    const originalFetch = window.fetch.bind(window);
+    let versions = null;
+    let database = null;
+
+    function openDatabase() {
+        if (!database) {
+            database = new Promise((resolve) => {
+                if (!window.indexedDB) {
+                    resolve(null);
+                    return;
+                }
+                const request = window.indexedDB.open(DATABASE_NAME, 1);
+                request.onupgradeneeded = () => request.result.createObjectStore(STORE_NAME, {keyPath: "key"});
+                request.onsuccess = () => resolve(request.result);
+                request.onerror = () => resolve(null);
+            });
+        }
+        return database;
+    }
+
+    function withStore(db, mode, action) {
+        return new Promise((resolve) => {
+            const transaction = db.transaction(STORE_NAME, mode);
+            const request = action(transaction.objectStore(STORE_NAME));
+            transaction.oncomplete = () => resolve(request ? request.result : undefined);
+            transaction.onerror = () => resolve(undefined);
+            transaction.onabort = () => resolve(undefined);
+        });
+    }
+
+    function stampFor(current, tables) {
+        const parts = ["code:" + current.code];
+        tables.forEach((table) => {
+            parts.push(table + ":" + (table === "day" ? new Date().toDateString() : current[table]));
+        });
+        return parts.join("|");
+    }
+
+    // Drop every response stamped with a version that is no longer current
+    async function prune(current) {
+        const db = await openDatabase();
+        if (!db) {
+            return;
+        }
+        withStore(db, "readwrite", (store) => {
+            const cursor = store.openCursor();
+            cursor.onsuccess = () => {
+                const entry = cursor.result;
+                if (!entry) {
+                    return;
+                }
+                const tables = entry.value.stamp.split("|").slice(1).map((part) => part.split(":")[0]);
+                if (entry.value.stamp !== stampFor(current, tables)) {
+                    entry.delete();
+                }
+                entry.continue();
+            };
+            return null;
+        });
+    }
+
+    function observeVersions(current) {
+        if (current && current.code) {
+            versions = Promise.resolve(current);
+            prune(current);
+        }
+        return current;
+    }
+
+    function currentVersions() {
+        if (!versions) {
+            versions = originalFetch("/api/version", {cache: "no-store"})
+                .then((response) => (response.ok ? response.json() : null))
+                .then(observeVersions)
+                .catch(() => null);
+        }
+        return versions;
+    }
+
+    function cachedTables(url, init) {
+        const method = ((init && init.method) || "GET").toUpperCase();
+        const path = url.split("?")[0];
+        if (method === "GET") {
+            const name = Object.keys(CACHED_REQUESTS).find((request) => path.endsWith(request));
+            return name ? CACHED_REQUESTS[name] : null;
+        }
+        if (!path.endsWith("_dash-update-component") || typeof init.body !== "string") {
+            return null;
+        }
+        try {
+            const payload = JSON.parse(init.body);
+            if ((payload.changedPropIds || []).some((prop) => LIVE_INPUTS.includes(prop))) {
+                return null;
+            }
+            const output = [].concat(payload.outputs)[0];
+            return CACHED_OUTPUTS[output.id + "." + output.property] || null;
+        } catch (err) {
+            return null;
+        }
+    }
+
+    function replay(entry) {
+        // A 204 is how Dash says "no update", and a 204 response cannot carry a body
+        const body = entry.status === 204 ? null : entry.body;
+        return new Response(body, {status: entry.status, headers: {"Content-Type": entry.contentType}});
+    }
+
+    window.fetch = async function (input, init) {
+        const url = typeof input === "string" ? input : input.url;
+        if (url.split("?")[0].endsWith("/api/version")) {
+            const response = await originalFetch(input, init);
+            if (response.ok) {
+                response.clone().json().then(observeVersions).catch(() => null);
+            }
+            return response;
+        }
+
+        const tables = typeof input === "string" ? cachedTables(url, init) : null;
+        if (!tables) {
+            return originalFetch(input, init);
+        }
+        const [current, db] = await Promise.all([currentVersions(), openDatabase()]);
+        if (!current || !db) {
+            return originalFetch(input, init);
+        }
+
+        const stamp = stampFor(current, tables);
+        const key = stamp + "|" + url + "|" + ((init && init.body) || "");
+        const cached = await withStore(db, "readonly", (store) => store.get(key));
+        if (cached) {
+            return replay(cached);
+        }
+
+        const response = await originalFetch(input, init);
+        if (response.status === 200 || response.status === 204) {
+            const contentType = response.headers.get("Content-Type") || "application/json";
+            response.clone().text().then((body) => withStore(db, "readwrite", (store) => store.put({
+                key: key,
+                stamp: stamp,
+                status: response.status,
+                contentType: contentType,
+                body: body
+            })));
+        }
+        return response;
+    };
+})();
@@ -0,0 +1,49 @@
+// Live Sync
+// Listens to /api/sync/events and re-runs the dashboard's version check whenever laps are synced,
+// so only the components whose table changed refresh. One tab per browser holds the stream
+// (whichever holds the Web Lock) and relays events to the other tabs over a BroadcastChannel,
+// so many open tabs still cost the server a single connection. The server only keeps a stream
+// open while laps are arriving; the rest of the time the tab asks again once a minute.
+(function () {
+    const LOCK_NAME = "swim-live-sync";
+    const CHECK_INTERVAL = 60000;
+    const channel = "BroadcastChannel" in window ? new BroadcastChannel(LOCK_NAME) : null;
+
+    function refresh(event) {
+        try {
+            // The version check compares against this tab's own stores, so it is a no-op when nothing changed
+            window.dash_clientside.set_props("refresh_interval", {n_intervals: Date.now()});
+        } catch (err) {
+            // The dashboard is still loading; the layout it gets already has the latest versions
+        }
+        window.dispatchEvent(new CustomEvent("swim-sync", {detail: event}));
+    }
+
+    function listen(onEvent) {
+        // Never settles, so the lock is held for as long as this tab is open
+        return new Promise(() => {
+            function open() {
+                const source = new EventSource("/api/sync/events");
+                source.onmessage = (message) => onEvent(JSON.parse(message.data));
+                // A 204 (nothing syncing, or no thread to spare) closes the source for good,
+                // while network errors leave it reconnecting on its own
+                source.onerror = () => {
+                    if (source.readyState === EventSource.CLOSED) {
+                        setTimeout(open, CHECK_INTERVAL);
+                    }
+                };
+            }
+            open();
+        });
+    }
+
+    if (channel && navigator.locks) {
+        channel.onmessage = (message) => refresh(message.data);
+        navigator.locks.request(LOCK_NAME, () => listen((event) => {
+            channel.postMessage(event);
+            refresh(event);
+        }));
+    } else {
+        listen(refresh);
+    }
+})();
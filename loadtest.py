@@ -0,0 +1,238 @@
+# Load Testing
+# Replays overview, table and export click patterns against the dashboard through the same
+# callback requests the browser sends, and reports p50/p95/p99 latency and throughput for
+# each gunicorn worker configuration.
+#
+#   python loadtest.py --configs sync:2x1,gthread:1x4,gthread:2x4 --users 8 --duration 30
+#   python loadtest.py --url http://127.0.0.1:8050 --users 8
+#
+# A configuration is worker_class:WORKERSxTHREADS. With --url the running server is tested instead.
+
+# Imports
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import numpy as np
+
+
+# Click Patterns
+# Each step is (label, output, changed input, input values); missing inputs are sent as None.
+# Outputs starting with "/" are page requests. A callback step with no changed input is the
+# initial call Dash makes for every chart when the overview page mounts.
+def overview_pattern(workout):
+    date_range = {"start": None, "end": None}
+    season = {"start": "2025-09-01", "end": "2026-08-31"}
+    hidden_drilldown = {"marginBottom": "20px", "display": "none"}
+    return [
+        ("page", "/", None, None),
+        ("layout", "/_dash-layout", None, None),
+        ("open overview", "page-content.children", "nav-overview.n_clicks", {"nav-overview.n_clicks": 1, "date_range.data": date_range}),
+        ("overview", "yardage_overview_chart.figure", None, {"url.pathname": "/", "date_range.data": date_range, "year_filter.value": "all"}),
+        ("year over year", "yoy_chart.figure", None, {}),
+        ("drill-down", "lap_drilldown_chart.figure", None, {"lap_drilldown_row.style": hidden_drilldown}),
+        ("pick season", "date_range.data", "date_range_preset.value", {"date_range_preset.value": "season_2025"}),
+        ("overview range", "yardage_overview_chart.figure", "date_range.data", {"url.pathname": "/", "date_range.data": season, "year_filter.value": "all"}),
+        ("overview workout", "yardage_overview_chart.figure", "workout_filter.value", {"url.pathname": "/", "date_range.data": season, "year_filter.value": "all", "workout_filter.value": workout}),
+        ("lap drill-down", "lap_drilldown_chart.figure", "workout_filter.value", {"workout_filter.value": workout, "lap_drilldown_row.style": hidden_drilldown})
+    ]
+
+
+def table_pattern(workout):
+    return [
+        ("open table", "page-content.children", "nav-table.n_clicks", {"nav-table.n_clicks": 1}),
+        ("select column", "recent_workouts.style_data_conditional", "recent_workouts.selected_columns", {"recent_workouts.selected_columns": ["total_distance"]})
+    ]
+
+
+def export_pattern(workout):
+    return [
+        ("open export", "page-content.children", "nav-export.n_clicks", {"nav-export.n_clicks": 1}),
+        ("excel export", "download_excel.data", "export_excel_btn.n_clicks", {"export_excel_btn.n_clicks": 1})
+    ]
+
+
+PATTERNS = [
+    (overview_pattern, 6),
+    (table_pattern, 3),
+    (export_pattern, 1)
+]
+
+
+# Dash Callback Requests
+def split_outputs(output):
+    # Multi-output callbacks are registered as "..a.prop...b.prop.."
+    names = output[2:-2].split("...") if output.startswith("..") else [output]
+    return [dict(zip(("id", "property"), name.rsplit(".", 1))) for name in names]
+
+
+def load_callbacks(base_url):
+    with urllib.request.urlopen(f"{base_url}/_dash-dependencies") as response:
+        dependencies = json.load(response)
+    callbacks = {}
+    for dependency in dependencies:
+        if dependency.get("clientside_function"):
+            continue
+        for output in split_outputs(dependency["output"]):
+            callbacks[f"{output['id']}.{output['property']}"] = dependency
+    return callbacks
+
+
+def callback_body(dependency, changed, values):
+    outputs = split_outputs(dependency["output"])
+
+    def fill(items):
+        return [{**item, "value": values.get(f"{item['id']}.{item['property']}")} for item in items]
+
+    return {
+        "output": dependency["output"],
+        "outputs": outputs if len(outputs) > 1 else outputs[0],
+        "inputs": fill(dependency["inputs"]),
+        "state": fill(dependency["state"]),
+        "changedPropIds": [changed] if changed else []
+    }
+
+
+def send(base_url, callbacks, step):
+    label, target, changed, values = step
+    if target.startswith("/"):
+        request = urllib.request.Request(f"{base_url}{target}")
+    else:
+        body = json.dumps(callback_body(callbacks[target], changed, values)).encode()
+        request = urllib.request.Request(f"{base_url}/_dash-update-component", data=body, headers={"Content-Type": "application/json"})
+
+    began = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=60) as response:
+            response.read()
+        ok = True
+    except (urllib.error.URLError, OSError):
+        ok = False
+    return label, time.perf_counter() - began, ok
+
+
+# Virtual Users
+def run_user(base_url, callbacks, workouts, deadline, think_time, results, seed):
+    rng = random.Random(seed)
+    patterns, weights = zip(*PATTERNS)
+    while time.perf_counter() < deadline:
+        pattern = rng.choices(patterns, weights)[0]
+        for step in pattern(rng.choice(workouts)):
+            if time.perf_counter() >= deadline:
+                return
+            results.append(send(base_url, callbacks, step))
+            if think_time:
+                time.sleep(rng.uniform(0, think_time))
+
+
+def run_load(base_url, users, duration, think_time):
+    callbacks = load_callbacks(base_url)
+    with urllib.request.urlopen(f"{base_url}/api/workouts?fields=workout_id&limit=1000") as response:
+        workouts = [item["workout_id"] for item in json.load(response)["items"]]
+
+    # One unmeasured pass so every worker has its views built before timing starts
+    for pattern, _ in PATTERNS:
+        for step in pattern(workouts[-1]):
+            send(base_url, callbacks, step)
+
+    results = []
+    began = time.perf_counter()
+    deadline = began + duration
+    threads = [
+        threading.Thread(target=run_user, args=(base_url, callbacks, workouts, deadline, think_time, results, seed))
+        for seed in range(users)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, time.perf_counter() - began
+
+
+# Reporting
+def summarize(results, elapsed):
+    rows = []
+    for label in dict.fromkeys(label for label, _, _ in results):
+        latencies = np.array([latency for name, latency, _ in results if name == label]) * 1000
+        errors = sum(1 for name, _, ok in results if name == label and not ok)
+        rows.append((label, len(latencies), errors, *np.percentile(latencies, [50, 95, 99])))
+    latencies = np.array([latency for _, latency, _ in results]) * 1000
+    errors = sum(1 for _, _, ok in results if not ok)
+    rows.append(("all requests", len(latencies), errors, *np.percentile(latencies, [50, 95, 99])))
+    return rows, len(results) / elapsed
+
+
+def print_report(name, rows, throughput):
+    print(f"\n{name}: {throughput:,.1f} requests/s")
+    print(f"  {'request':<18}{'count':>7}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for label, count, errors, p50, p95, p99 in rows:
+        print(f"  {label:<18}{count:>7}{errors:>8}{p50:>10.1f}{p95:>10.1f}{p99:>10.1f}")
+
+
+# Worker Configurations
+def parse_config(config):
+    worker_class, shape = config.split(":")
+    workers, threads = shape.lower().split("x")
+    return worker_class, int(workers), int(threads)
+
+
+def start_server(config, port):
+    worker_class, workers, threads = parse_config(config)
+    command = [
+        sys.executable, "-m", "gunicorn", "app:server",
+        "--worker-class", worker_class,
+        "--workers", str(workers),
+        "--threads", str(threads),
+        "--bind", f"127.0.0.1:{port}",
+        "--timeout", "120"
+    ]
+    server = subprocess.Popen(command, cwd=os.path.dirname(os.path.abspath(__file__)), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.perf_counter() + 120
+    while time.perf_counter() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"gunicorn exited while starting {config}")
+        try:
+            with urllib.request.urlopen(f"{base_url}/api/version", timeout=2):
+                return server, base_url
+        except (urllib.error.URLError, OSError):
+            time.sleep(0.5)
+    server.terminate()
+    raise RuntimeError(f"gunicorn did not start {config} in time")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay dashboard click patterns and report latency per worker configuration")
+    parser.add_argument("--configs", default="sync:1x1,sync:4x1,gthread:1x4,gthread:2x4", help="comma separated worker_class:WORKERSxTHREADS")
+    parser.add_argument("--url", help="test an already running server instead of starting gunicorn")
+    parser.add_argument("--users", type=int, default=8, help="concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=30, help="seconds to run each configuration")
+    parser.add_argument("--think-time", type=float, default=0, help="longest random pause between clicks, in seconds")
+    parser.add_argument("--port", type=int, default=8061)
+    args = parser.parse_args()
+
+    if args.url:
+        results, elapsed = run_load(args.url.rstrip("/"), args.users, args.duration, args.think_time)
+        print_report(args.url, *summarize(results, elapsed))
+        return
+
+    for config in args.configs.split(","):
+        server, base_url = start_server(config, args.port)
+        try:
+            results, elapsed = run_load(base_url, args.users, args.duration, args.think_time)
+        finally:
+            server.terminate()
+            server.wait()
+        print_report(config, *summarize(results, elapsed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+# Sync Daemon
+# Stands in for a watch while testing live sync: replays one workout's laps from a lap CSV to
+# /api/sync in small batches, the way laps arrive while a workout is still going.
+#
+#   python sync_daemon.py --url http://127.0.0.1:8050
+#   python sync_daemon.py --source laps.csv --day 10/14/2025 --batch 3 --interval 5
+#
+# The server only accepts syncs carrying its SWIM_WRITE_TOKEN, read from the same variable or --token.
+#
+# By default the workout is moved to today, so its laps are new to the dashboard each run.
+
+# Imports
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime
+
+LAP_START_FORMAT = "%m/%d/%Y, %I:%M:%S %p"
+LAP_TIME_FORMAT = "%I:%M:%S %p"
+
+
+# Workout Laps
+def read_workout(source, day):
+    with open(source, newline="") as lap_file:
+        laps = list(csv.DictReader(lap_file))
+    day = day or laps[-1]["date"]
+    workout = []
+    for lap in laps:
+        if lap["date"] != day:
+            continue
+        # A message index that restarts begins the day's next workout
+        index = int(lap["message_index"].strip("[] "))
+        if workout and index <= int(workout[-1]["message_index"].strip("[] ")):
+            break
+        workout.append(lap)
+    if not workout:
+        raise SystemExit(f"No laps on {day} in {source}")
+    return workout
+
+
+def move_to_day(laps, day):
+    moved = []
+    for lap in laps:
+        start = datetime.strptime(lap["start_time"], LAP_START_FORMAT)
+        start = datetime.combine(day, start.time())
+        moved.append({**lap, "date": start.strftime("%m/%d/%Y"), "start_time": start.strftime(LAP_START_FORMAT)})
+    return moved
+
+
+# Sync Requests
+def post_laps(url, token, laps):
+    body = [{key: (value if value != "" else None) for key, value in lap.items()} for lap in laps]
+    headers = {"Content-Type": "application/json", "X-Swim-Write-Token": token}
+    request = urllib.request.Request(f"{url}/api/sync", data=json.dumps({"laps": body}).encode(), headers=headers)
+    try:
+        with urllib.request.urlopen(request, timeout=30) as response:
+            return json.load(response)
+    except urllib.error.HTTPError as err:
+        return json.load(err)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a workout's laps to the dashboard's sync endpoint")
+    parser.add_argument("--url", default="http://127.0.0.1:8050")
+    parser.add_argument("--source", default="assets/aggregated_swim_data.csv", help="lap CSV to replay from")
+    parser.add_argument("--day", help="MM/DD/YYYY of the workout to replay (default: the last one)")
+    parser.add_argument("--as-of", default=datetime.now().strftime("%Y-%m-%d"), help="date to move the workout to, or 'keep'")
+    parser.add_argument("--batch", type=int, default=2, help="laps per sync message")
+    parser.add_argument("--interval", type=float, default=3, help="seconds between sync messages")
+    parser.add_argument("--token", default=os.environ.get("SWIM_WRITE_TOKEN"), help="the server's SWIM_WRITE_TOKEN")
+    args = parser.parse_args()
+    if not args.token:
+        parser.error("pass --token or set SWIM_WRITE_TOKEN")
+
+    laps = read_workout(args.source, args.day)
+    if args.as_of != "keep":
+        laps = move_to_day(laps, datetime.strptime(args.as_of, "%Y-%m-%d").date())
+
+    print(f"Syncing {len(laps)} laps from {laps[0]['date']} to {args.url}")
+    for start in range(0, len(laps), args.batch):
+        result = post_laps(args.url.rstrip("/"), args.token, laps[start:start + args.batch])
+        print(f"  laps {start + 1}-{min(start + args.batch, len(laps))}: {result}", file=sys.stderr)
+        if start + args.batch < len(laps):
+            time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
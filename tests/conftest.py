@@ -0,0 +1,24 @@
+import os
+import shutil
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+# The app reads its CSVs and assets relative to the repository root
+os.chdir(ROOT)
+
+import app
+
+
+# Copies of the CSVs, so imports never touch the real data
+@pytest.fixture
+def data_files(tmp_path, monkeypatch):
+    for name, path in app.DATA_FILES.items():
+        copy = tmp_path / os.path.basename(path)
+        shutil.copyfile(path, copy)
+        monkeypatch.setitem(app.DATA_FILES, name, str(copy))
+    monkeypatch.setattr(app, "DATA_LOCK_PATH", str(tmp_path / ".data.lock"))
+    monkeypatch.setattr(app, "IMPORT_DIR", str(tmp_path / "imports"))
+    return tmp_path
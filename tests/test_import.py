@@ -0,0 +1,80 @@
+import pandas as pd
+import pytest
+
+import app
+
+
+def test_reimported_daily_summary_is_skipped(data_files):
+    upload = data_files / "upload.csv"
+    upload.write_text("date,total_distance,total_elapsed_time\n2026-02-01,1000,1200\n")
+
+    assert app.import_file(str(upload)) == {"workouts_added": 1, "laps_added": 0, "duplicates": 0, "rejected": 0}
+    assert app.import_file(str(upload)) == {"workouts_added": 0, "laps_added": 0, "duplicates": 1, "rejected": 0}
+
+
+def test_reimported_laps_are_skipped(data_files):
+    with open(app.DATA_FILES["laps"]) as lap_file:
+        lines = lap_file.readlines()[:6]
+    upload = data_files / "laps.csv"
+    upload.write_text("".join(lines))
+
+    assert app.import_file(str(upload)) == {"workouts_added": 0, "laps_added": 0, "duplicates": 5, "rejected": 0}
+
+
+def test_import_needs_the_write_token(data_files, monkeypatch):
+    monkeypatch.setattr(app, "WRITE_TOKEN", "secret")
+    client = app.server.test_client()
+    body = b"date,total_distance,total_elapsed_time\n2026-02-01,1000,1200\n"
+
+    assert client.post("/api/import?filename=upload.csv", data=body).status_code == 403
+    assert client.post("/api/import?filename=upload.csv", data=body, headers={"X-Swim-Write-Token": "wrong"}).status_code == 403
+    assert client.post("/api/import?filename=upload.csv", data=body, headers={"X-Swim-Write-Token": "secret"}).status_code == 200
+
+
+@pytest.mark.parametrize("filename, body", [
+    ("upload.xlsx", b"not a zip file"),
+    ("upload.csv", "date,total_distance\n\xe9".encode("latin-1")),
+    ("upload.csv", b""),
+    ("upload.csv", b'date,total_distance,total_elapsed_time\n"2026-02-01,1000,1200\n')
+])
+def test_unreadable_import_is_rejected(data_files, monkeypatch, filename, body):
+    monkeypatch.setattr(app, "WRITE_TOKEN", "secret")
+    response = app.server.test_client().post(f"/api/import?filename={filename}", data=body, headers={"X-Swim-Write-Token": "secret"})
+
+    assert response.status_code == 400
+    assert "error" in response.get_json()
+
+
+def test_two_sessions_on_a_new_day_get_a_workout_each(data_files):
+    laps = pd.read_csv(app.DATA_FILES["laps"], dtype=str, keep_default_na=False)
+    day = laps[laps["date"] == laps["date"].iloc[0]]
+    # The day's first swim runs until its message index restarts
+    first_swim = day[(day["message_index"] == "[0]").cumsum() == 1]
+
+    def move(swim, hours):
+        start = pd.to_datetime(swim["start_time"], format=app.LAP_START_FORMAT).apply(lambda time: time.replace(2026, 2, 1)) + pd.Timedelta(hours=hours)
+        return swim.assign(date="02/01/2026", start_time=start.dt.strftime(app.LAP_START_FORMAT))
+
+    upload = data_files / "laps.csv"
+    pd.concat([move(first_swim, 0), move(first_swim, 6)]).to_csv(upload, index=False)
+
+    counts = app.import_file(str(upload))
+    assert counts["workouts_added"] == 2
+    assert counts["laps_added"] == 2 * len(first_swim)
+
+    dataset = app.refresh_data()
+    new_day = dataset.data[dataset.data["date"] == "2026-02-01"]
+    assert new_day["total_distance"].tolist() == pytest.approx([first_swim["total_distance"].replace("", "0").astype(float).sum()] * 2)
+    new_laps = dataset.agg_data[dataset.agg_data["lap_date"] == "2026-02-01"]
+    assert new_laps["workout_id"].notna().all()
+    assert sorted(new_laps["workout_id"].unique()) == sorted(new_day["workout_id"])
+
+
+def test_resynced_laps_are_skipped_after_the_file_is_rewritten(data_files):
+    laps = pd.read_csv(app.DATA_FILES["laps"], dtype=str, keep_default_na=False)
+    records = laps[laps["date"] == laps["date"].iloc[-1]].iloc[:3].replace("", None).to_dict("records")
+    assert app.sync_laps(records)[0]["duplicates"] == 3
+
+    # Dropping the first day moves every stored offset, so the sync has to index the file again
+    laps[laps["date"] != laps["date"].iloc[0]].to_csv(app.DATA_FILES["laps"], index=False)
+    assert app.sync_laps(records)[0]["duplicates"] == 3